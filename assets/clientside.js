@@ -0,0 +1,63 @@
+// Clientside callbacks for inputs that only change how a figure is shown, so they never reach the server.
+// Dash loads every .js file in assets/ and the callbacks are referenced as ClientsideFunction('oodash', ...).
+
+// plotly.py sends numeric arrays as {dtype, bdata} with the values base64 encoded
+var TYPED_ARRAYS = {
+    f8: Float64Array, f4: Float32Array,
+    i4: Int32Array, u4: Uint32Array,
+    i2: Int16Array, u2: Uint16Array,
+    i1: Int8Array, u1: Uint8Array
+};
+
+function decodeArray(values) {
+    if (!values || Array.isArray(values) || !values.bdata) {
+        return values || [];
+    }
+    var binary = atob(values.bdata);
+    var bytes = new Uint8Array(binary.length);
+    for (var i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return Array.from(new TYPED_ARRAYS[values.dtype](bytes.buffer));
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    oodash: {
+        // Chart height inputs: only the layout height changes
+        set_height: function(height, figure) {
+            if (!figure || !height) {
+                return window.dash_clientside.no_update;
+            }
+            return Object.assign({}, figure, {
+                layout: Object.assign({}, figure.layout, {height: height})
+            });
+        },
+
+        // Man hours / man days toggle of the project timeline: scales the bars by 8 hours per day
+        set_effort_unit: function(useManHours, figure) {
+            var layout = (figure && figure.layout) || {};
+            var unit = useManHours ? 'hours' : 'days';
+            if (!layout.meta || !layout.meta.effort_unit || layout.meta.effort_unit === unit) {
+                return window.dash_clientside.no_update;
+            }
+            var factor = useManHours ? 8 : 1 / 8;
+
+            var data = figure.data.map(function(trace) {
+                return Object.assign({}, trace, {
+                    y: decodeArray(trace.y).map(function(value) { return value * factor; }),
+                    hovertemplate: trace.hovertemplate && (useManHours
+                        ? trace.hovertemplate.replace('Days: %{y', 'Hours: %{y')
+                        : trace.hovertemplate.replace('Hours: %{y', 'Days: %{y'))
+                });
+            });
+            var yaxis = Object.assign({}, layout.yaxis, {
+                title: Object.assign({}, layout.yaxis && layout.yaxis.title, {text: useManHours ? 'Man Hours' : 'Man Days'})
+            });
+
+            return Object.assign({}, figure, {
+                data: data,
+                layout: Object.assign({}, layout, {yaxis: yaxis, meta: Object.assign({}, layout.meta, {effort_unit: unit})})
+            });
+        }
+    }
+});
@@ -0,0 +1,111 @@
+"""
+Compare the XML-RPC and JSON-RPC transports on a large search_read payload.
+
+A local stub server answers both /xmlrpc/2/object and /jsonrpc with the same
+synthetic timesheet rows, so no Odoo instance is needed:
+
+    python bench_transport.py --rows 200000 --repeat 3
+"""
+import argparse
+import json
+import threading
+import time
+import tracemalloc
+import xmlrpc.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from odoo_transport import JsonRpcPool, ServerProxyPool, json_loads, orjson
+
+def make_timesheet_rows(count):
+    return [
+        {
+            'id': i,
+            'employee_id': [i % 250, f'Employee {i % 250}'],
+            'task_id': [i % 5000, f'Task number {i % 5000}'] if i % 7 else False,
+            'project_id': [i % 400, f'Project {i % 400}'],
+            'unit_amount': (i % 32) / 4,
+            'date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+        }
+        for i in range(count)
+    ]
+
+def make_handler(xmlrpc_body, jsonrpc_body):
+    class StubOdooHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if self.path.startswith('/jsonrpc'):
+                body, content_type = jsonrpc_body, 'application/json'
+            else:
+                body, content_type = xmlrpc_body, 'text/xml'
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubOdooHandler
+
+def measure(label, func, repeat):
+    # Time without tracemalloc, it slows down allocation heavy parsers a lot
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+        del result
+
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+
+    print(f"{label:<28} best {min(timings) * 1000:8.1f} ms   peak {peak / 1024 / 1024:8.1f} MiB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help="Number of timesheet rows in the payload")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement, the best one is reported")
+    args = parser.parse_args()
+
+    rows = make_timesheet_rows(args.rows)
+    xmlrpc_body = xmlrpc.client.dumps((rows,), methodresponse=True, allow_none=True).encode('utf-8')
+    jsonrpc_body = json.dumps({'jsonrpc': '2.0', 'id': 1, 'result': rows}).encode('utf-8')
+    del rows
+
+    print(f"{args.rows} rows, XML-RPC payload {len(xmlrpc_body) / 1024 / 1024:.1f} MiB, "
+          f"JSON-RPC payload {len(jsonrpc_body) / 1024 / 1024:.1f} MiB, "
+          f"JSON decoder: {'orjson' if orjson is not None else 'json'}")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(xmlrpc_body, jsonrpc_body))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    call_args = ('db', 1, 'key', 'account.analytic.line', 'search_read', [[], []], {})
+
+    print("\nDecode only")
+    measure('xmlrpc.client.loads', lambda: xmlrpc.client.loads(xmlrpc_body, use_builtin_types=True), args.repeat)
+    measure('json_loads', lambda: json_loads(jsonrpc_body), args.repeat)
+
+    print("\nFull call through the connection pool")
+    xmlrpc_pool = ServerProxyPool(f'{base_url}/xmlrpc/2/object', size=1)
+    jsonrpc_pool = JsonRpcPool(f'{base_url}/jsonrpc', 'object', size=1)
+
+    def call(pool):
+        with pool.borrow() as proxy:
+            return proxy.execute_kw(*call_args)
+
+    measure('xmlrpc execute_kw', lambda: call(xmlrpc_pool), args.repeat)
+    measure('jsonrpc execute_kw', lambda: call(jsonrpc_pool), args.repeat)
+
+    xmlrpc_pool.close()
+    jsonrpc_pool.close()
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,11 @@ from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
 import dash
 import pandas as pd
+from dash.exceptions import PreventUpdate
+from chart_builder import use_webgl
 from data_management import DataManager
+from downsampling import downsample_line, max_points, zoom_event, zoomed_range
+from layout import TABS, tab_content_id
 from logging_config import setup_logging
 
 logger = setup_logging()
@@ -31,21 +35,52 @@ def register_callbacks(app, data_manager: DataManager):
     logger.info("Registered all callbacks")
 
     @app.callback(
-        [Output('last-update-time', 'children'),
-        Output('project-filter', 'options'),
-        Output('employee-filter', 'options'),
-        Output('project-selector', 'options')],
-        [Input('refresh-data', 'n_clicks')],
-        [State('project-filter', 'options'),
-        State('employee-filter', 'options'),
-        State('project-selector', 'options')]
+        Output('data-version', 'data'),
+        [Input('data-version-poll', 'n_intervals')],
+        [State('data-version', 'data')]
+    )
+    def poll_data_version(n_intervals, current_version):
+        # Cheap when nothing changed: no_update keeps every figure callback from firing
+        data_manager.reload_if_changed()
+        if data_manager.data_version == current_version:
+            return dash.no_update
+        logger.info(f"Data version changed from {current_version} to {data_manager.data_version}")
+        return data_manager.data_version
+
+    @app.callback(
+        [Output(tab_content_id(value), 'children') for _, value, _ in TABS] + [Output('built-tabs', 'data')],
+        [Input('tabs', 'value')],
+        [State('built-tabs', 'data')]
+    )
+    def render_tab(active_tab, built_tabs):
+        # Build a tab the first time it is opened, its callbacks then run for the first time when its components appear.
+        # Only the values of the built tabs come back from the browser, not their components.
+        built_tabs = built_tabs or []
+        if active_tab in built_tabs:
+            raise PreventUpdate
+        return [
+            create_tab(data_manager) if value == active_tab else dash.no_update
+            for _, value, create_tab in TABS
+        ] + [built_tabs + [active_tab]]
+
+    # The browser window width, charts with more points than pixels are downsampled to it
+    app.clientside_callback(
+        "function(n_intervals) { return window.innerWidth; }",
+        Output('viewport-width', 'data'),
+        [Input('data-version-poll', 'n_intervals')]
+    )
+
+    @app.callback(
+        Output('last-update-time', 'children'),
+        [Input('refresh-data', 'n_clicks'),
+        Input('data-version', 'data')]
     )
-    def refresh_dashboard_data(n_clicks, current_portfolio_options, current_employee_options, current_project_options):
+    def refresh_dashboard_data(n_clicks, data_version):
         ctx = dash.callback_context
         if not ctx.triggered:
             logger.info("Initial load")
             data_manager.load_all_data()
-        else:
+        elif ctx.triggered[0]['prop_id'] == 'refresh-data.n_clicks':
             logger.info("Force refresh")
             data_manager.load_all_data(force=True)
         
@@ -54,18 +89,39 @@ def register_callbacks(app, data_manager: DataManager):
             
             last_update = f"Last updated: {data_manager.last_update.strftime('%Y-%m-%d %H:%M:%S')}"
             logger.info(f"Returning data and {last_update}")
+            return last_update
+        else:
+            logger.warning("Data is empty")
+            return "Failed to update data"
 
-            df_projects = data_manager.df_portfolio
-            df_employees = data_manager.df_employees
+    # The filters only hold the names matching what was typed, searched on the server. Chained on
+    # last-update-time so they are refreshed once new data has been loaded
+    @app.callback(
+        Output('project-filter', 'options'),
+        [Input('project-filter', 'search_value'),
+        Input('last-update-time', 'children')],
+        [State('project-filter', 'value')]
+    )
+    def search_project_filter(search_value, last_update, selected_projects):
+        return data_manager.get_name_index('df_portfolio').options(search_value, selected_projects)
 
-            portfolio_options = [{'label': i, 'value': i} for i in df_projects['name'].unique() if pd.notna(i)]
-            employee_options = [{'label': i, 'value': i} for i in df_employees['name'].unique() if pd.notna(i)]
-            project_options = portfolio_options # same as portfolio but only one can be chosen
+    @app.callback(
+        Output('employee-filter', 'options'),
+        [Input('employee-filter', 'search_value'),
+        Input('last-update-time', 'children')],
+        [State('employee-filter', 'value')]
+    )
+    def search_employee_filter(search_value, last_update, selected_employees):
+        return data_manager.get_name_index('df_employees').options(search_value, selected_employees)
 
-            return last_update, portfolio_options, employee_options, project_options
-        else:
-            logger.warning("Data is empty")
-            return "Failed to update data", current_portfolio_options, current_employee_options, current_project_options
+    @app.callback(
+        Output('history-status', 'children'),
+        [Input('date-range', 'start_date')]
+    )
+    def load_history(start_date):
+        if data_manager.ensure_history(start_date):
+            return f"History loaded from {data_manager.history_start.strftime('%Y-%m-%d')}"
+        return ""
 
     @app.callback(
         Output('project-filter', 'disabled'),
@@ -77,12 +133,31 @@ def register_callbacks(app, data_manager: DataManager):
     @app.callback(
         Output('sales-chart', 'figure'),
         [Input('date-range', 'start_date'),
-         Input('date-range', 'end_date')],
-        [State('sales-task-filter', 'value')]
+         Input('date-range', 'end_date'),
+         Input('data-version', 'data'),
+         Input('sales-chart', 'relayoutData'),
+         Input('tabs', 'value'),
+         Input('apply-sales-filter', 'n_clicks')],
+        [State('sales-task-filter', 'value'),
+         State('viewport-width', 'data')]
     )
-    def update_sales(start_date, end_date, task_filter):
+    def update_sales(start_date, end_date, data_version, relayout_data, active_tab, apply_clicks, task_filter, viewport_width):
+        if active_tab != 'sales-tab':
+            raise PreventUpdate
+
+        # Zooming re-requests the zoomed window at full resolution, resetting the axes the whole range
+        zoom = None
+        ctx = dash.callback_context
+        if ctx.triggered and ctx.triggered[0]['prop_id'] == 'sales-chart.relayoutData':
+            if not zoom_event(relayout_data):
+                raise PreventUpdate
+            zoom = zoomed_range(relayout_data)
+
+        data_manager.ensure_history(start_date)
         start_date = pd.to_datetime(start_date)
         end_date = pd.to_datetime(end_date)
+        if zoom:
+            start_date, end_date = max(start_date, zoom[0]), min(end_date, zoom[1])
 
         # Check if 'date_order' column exists, if not, try to find an alternative
         date_column = 'date_order'
@@ -104,8 +179,9 @@ def register_callbacks(app, data_manager: DataManager):
         ]
 
         if task_filter:
-            keywords = [keyword.strip().lower() for keyword in task_filter.split(',')]
-            filtered_tasks = filtered_tasks[filtered_tasks['name'].str.lower().str.contains('|'.join(keywords))]
+            # Tasks with a name matching any of the comma-separated keywords
+            task_ids = data_manager.get_token_index('df_tasks').search_any(task_filter.split(','))
+            filtered_tasks = filtered_tasks[filtered_tasks['id'].isin(task_ids)]
 
         if filtered_sales.empty and filtered_tasks.empty:
             return go.Figure()
@@ -113,14 +189,27 @@ def register_callbacks(app, data_manager: DataManager):
         daily_sales = filtered_sales.groupby(date_column)['amount_total'].sum().reset_index()
         daily_tasks = filtered_tasks.groupby('create_date').size().reset_index(name='task_count')
 
+        # No point sending more points than the chart has pixels
+        threshold = max_points(viewport_width)
+        plotted_sales = downsample_line(daily_sales, date_column, 'amount_total', threshold)
+        plotted_tasks = downsample_line(daily_tasks, 'create_date', 'task_count', threshold)
+        downsampled = len(plotted_sales) < len(daily_sales) or len(plotted_tasks) < len(daily_tasks)
+
+        scatter = go.Scattergl if use_webgl(len(plotted_sales) + len(plotted_tasks)) else go.Scatter
+
         fig = go.Figure()
-        fig.add_trace(go.Scatter(x=daily_sales[date_column], y=daily_sales['amount_total'], name='Sales', mode='lines'))
-        fig.add_trace(go.Scatter(x=daily_tasks['create_date'], y=daily_tasks['task_count'], name='Tasks', mode='lines', yaxis='y2'))
+        fig.add_trace(scatter(x=plotted_sales[date_column], y=plotted_sales['amount_total'], name='Sales', mode='lines'))
+        fig.add_trace(scatter(x=plotted_tasks['create_date'], y=plotted_tasks['task_count'], name='Tasks', mode='lines', yaxis='y2'))
+
+        title = 'Sales and Tasks Over Time'
+        if downsampled:
+            title += f" ({len(plotted_sales) + len(plotted_tasks):,} of {len(daily_sales) + len(daily_tasks):,} points, zoom in for detail)"
 
         fig.update_layout(
-            title='Sales and Tasks Over Time',
+            title=title,
             xaxis_title='Date',
             yaxis_title='Sales Amount',
+            xaxis_range=[start_date, end_date] if zoom else None,
             yaxis2=dict(title='Number of Tasks', overlaying='y', side='right')
         )
 
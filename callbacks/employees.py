@@ -1,8 +1,10 @@
-from dash.dependencies import Input, Output
-import plotly.graph_objs as go
+from dash.dependencies import ClientsideFunction, Input, Output, State
+from dash.exceptions import PreventUpdate
 import pandas as pd
 
+from chart_builder import bar, bucket_top_n, figure, series_order
 from data_management import DataManager
+from figure_cache import memoize_figures
 from logging_config import setup_logging
 
 logger = setup_logging()
@@ -17,9 +19,16 @@ def register_employees_callbacks(app, data_manager: DataManager):
         Input('date-range', 'end_date'),
         Input('project-filter', 'value'),
         Input('employee-filter', 'value'),
-        Input('employee-chart-height', 'value')]
+        Input('data-version', 'data'),
+        Input('tabs', 'value')],
+        [State('employee-chart-height', 'value')]
     )
-    def update_employee_hours(start_date, end_date, selected_projects, selected_employees, chart_height):
+    @memoize_figures(data_manager, 'update_employee_hours')
+    def update_employee_hours(start_date, end_date, selected_projects, selected_employees, data_version, active_tab, chart_height):
+        if active_tab != 'employees-tab':
+            raise PreventUpdate
+
+        data_manager.ensure_history(start_date)
         start_date = pd.to_datetime(start_date)
         end_date = pd.to_datetime(end_date)
 
@@ -34,22 +43,24 @@ def register_employees_callbacks(app, data_manager: DataManager):
         if selected_employees:
             filtered_timesheet = filtered_timesheet[filtered_timesheet['employee_name'].isin(selected_employees)]
 
-        employee_hours = filtered_timesheet.groupby(['employee_name', 'project_name'])['unit_amount'].sum().reset_index()
+        # total_hours below still covers every project, only the traces are folded
+        employee_hours = bucket_top_n(filtered_timesheet, 'project_name', 'unit_amount')
+        employee_hours = employee_hours.groupby(['employee_name', 'project_name'])['unit_amount'].sum().reset_index()
         employee_hours['unit_amount'] = employee_hours['unit_amount'].round().astype(int)
 
         total_hours = employee_hours['unit_amount'].sum()
 
         sorted_employees = sorted(employee_hours['employee_name'].unique())
 
-        fig = go.Figure()
-        for project in employee_hours['project_name'].unique():
+        traces = []
+        for project in series_order(employee_hours['project_name']):
             project_data = employee_hours[employee_hours['project_name'] == project]
 
             full_data = pd.DataFrame({'employee_name': sorted_employees})
             full_data = full_data.merge(project_data, on='employee_name', how='left')
             full_data['unit_amount'] = full_data['unit_amount'].fillna(0)
 
-            fig.add_trace(go.Bar(
+            traces.append(bar(
                 x=full_data['employee_name'],
                 y=full_data['unit_amount'],
                 name=project,
@@ -58,11 +69,11 @@ def register_employees_callbacks(app, data_manager: DataManager):
                 hovertemplate='<b>Employee:</b> %{x}<br><b>Project:</b> ' + project + '<br><b>Hours:</b> %{y}<extra></extra>'
             ))
 
-        fig.update_layout(
+        fig = figure(
+            traces,
             barmode='stack',
-            title='Employee Hours per Project',
-            xaxis_title='Employee',
-            yaxis_title='Hours',
+            title={'text': 'Employee Hours per Project'},
+            yaxis={'title': {'text': 'Hours'}},
             height=chart_height,
             legend=dict(
                 orientation="v",
@@ -77,18 +88,13 @@ def register_employees_callbacks(app, data_manager: DataManager):
             ),
             margin=dict(r=250, b=100, t=50, l=50),
             xaxis=dict(
+                title={'text': 'Employee'},
                 tickangle=45,
                 automargin=True,
                 categoryorder='array',
-                categoryarray=sorted_employees
-            )
-        )
-
-        fig.update_layout(
-            xaxis=dict(
+                categoryarray=sorted_employees,
                 rangeslider=dict(visible=False),
-                range=[0, 20],
-                automargin=True
+                range=[0, 20]
             ),
             updatemenus=[
                 dict(
@@ -108,3 +114,12 @@ def register_employees_callbacks(app, data_manager: DataManager):
         )
 
         return fig, f"Total Hours Worked: {total_hours}"
+
+    # Changing the height only touches the figure layout, so it is done in the browser
+    app.clientside_callback(
+        ClientsideFunction(namespace='oodash', function_name='set_height'),
+        Output('employee-hours-chart', 'figure', allow_duplicate=True),
+        [Input('employee-chart-height', 'value')],
+        [State('employee-hours-chart', 'figure')],
+        prevent_initial_call=True
+    )
@@ -3,8 +3,11 @@ import plotly.graph_objs as go
 import pandas as pd
 import dash
 from datetime import datetime
+from dash.exceptions import PreventUpdate
 
 from data_management import DataManager
+from downsampling import zoom_event, zoomed_range
+from executors import run_concurrently
 from financial_calculator import FinancialCalculator
 from logging_config import setup_logging
 
@@ -15,39 +18,85 @@ def register_financials_callbacks(app, data_manager: DataManager):
 
     financial_calculator = FinancialCalculator(data_manager)
 
+    @app.callback(
+        Output('financials-store', 'data'),
+        [Input('calculate-button', 'n_clicks')],
+        [State('date-range', 'start_date'),
+         State('date-range', 'end_date')],
+        background=True,
+        running=[
+            (Output('calculate-button', 'disabled'), True, False),
+            (Output('cancel-calculation-button', 'disabled'), False, True)
+        ],
+        cancel=[Input('cancel-calculation-button', 'n_clicks')],
+        progress=[Output('calculation-progress-bar', 'value'),
+                  Output('calculation-progress-bar', 'max'),
+                  Output('calculation-progress', 'children')],
+        prevent_initial_call=True
+    )
+    def calculate_financials(set_progress, n_clicks, start_date, end_date):
+        # Runs in a worker process of the background callback manager, the result is shared through the financials file
+        data_manager.ensure_history(start_date)
+        start_date = pd.to_datetime(start_date)
+        end_date = pd.to_datetime(end_date)
+
+        def report_progress(position, total, project_name):
+            set_progress((str(position), str(total), f"Calculating {project_name} ({position}/{total})"))
+
+        financials_data = financial_calculator.calculate_all_financials(start_date, end_date, progress_callback=report_progress)
+        data_manager.save_financials_data(financials_data)
+        calculated_at = datetime.now()
+        data_manager.set_last_calculation_time(calculated_at)
+
+        set_progress(('1', '1', f"Calculation complete: {len(financials_data)} projects"))
+        return {'calculated_at': calculated_at.isoformat()}
+
     @app.callback(
         [Output('financials-chart', 'figure'),
          Output('total-revenue-display', 'children'),
          Output('all-projects-hours-chart', 'figure'),
-         Output('all-projects-revenue-chart', 'figure'),
-         Output('calculation-progress', 'children'),
-         Output('calculate-button', 'disabled')],
+         Output('all-projects-revenue-chart', 'figure')],
         [Input('date-range', 'start_date'),
          Input('date-range', 'end_date'),
-         Input('calculate-button', 'n_clicks'),
+         Input('financials-store', 'data'),
          Input('project-filter', 'value'),
-         Input('employee-filter', 'value')]
+         Input('employee-filter', 'value'),
+         Input('data-version', 'data'),
+         Input('all-projects-hours-chart', 'relayoutData'),
+         Input('tabs', 'value')],
+        [State('viewport-width', 'data')]
     )
-    def update_financials(start_date, end_date, n_clicks, selected_projects, selected_employees):
+    def update_financials(start_date, end_date, calculation, selected_projects, selected_employees, data_version, hours_relayout,
+                          active_tab, viewport_width):
+        if active_tab != 'financials-tab':
+            raise PreventUpdate
+
         ctx = dash.callback_context
+        if ctx.triggered and 'financials-store' in ctx.triggered[0]['prop_id']:
+            data_manager.financials_data = data_manager.load_financials_data()
+
+        # Zooming the hours chart only redraws it, at the finest bucket that fits the zoomed range
+        hours_zoom = None
+        hours_only = bool(ctx.triggered) and ctx.triggered[0]['prop_id'] == 'all-projects-hours-chart.relayoutData'
+        if hours_only:
+            if not zoom_event(hours_relayout):
+                raise PreventUpdate
+            hours_zoom = zoomed_range(hours_relayout)
+
         if not ctx.triggered and not data_manager.financials_data:
             empty_fig = go.Figure()
-            return [empty_fig, "No data calculated yet", empty_fig, empty_fig, "No data calculated yet", False]
+            return [empty_fig, "No data calculated yet", empty_fig, empty_fig]
 
         try:
+            data_manager.ensure_history(start_date)
             start_date = pd.to_datetime(start_date)
             end_date = pd.to_datetime(end_date)
 
             financials_data = data_manager.load_financials_data(start_date, end_date)
 
-            if not financials_data or 'calculate-button' in ctx.triggered[0]['prop_id']:
-                financials_data = financial_calculator.calculate_all_financials(start_date, end_date)
-                data_manager.save_financials_data(financials_data)
-                data_manager.set_last_calculation_time(datetime.now())
-
             if not financials_data:
                 empty_fig = go.Figure()
-                return empty_fig, "No data available", empty_fig, empty_fig, "No data available. Please check your date range."
+                return [empty_fig, "No data calculated yet, click Calculate Financials", empty_fig, empty_fig]
 
             # Filter the data based on selected projects and employees
             filtered_data = {}
@@ -66,10 +115,16 @@ def register_financials_callbacks(app, data_manager: DataManager):
                         'daily_data': daily_data.to_dict('records')
                     }
 
+            if hours_only:
+                fig_hours = financial_calculator.create_hours_chart(filtered_data, viewport_width, hours_zoom)
+                return [dash.no_update, dash.no_update, fig_hours, dash.no_update]
+
             # Create charts using the filtered data
-            fig_financials = financial_calculator.create_financials_chart(filtered_data)
-            fig_hours = financial_calculator.create_hours_chart(filtered_data)
-            fig_revenue = financial_calculator.create_revenue_chart(filtered_data)
+            fig_financials, fig_hours, fig_revenue = run_concurrently([
+                (financial_calculator.create_financials_chart, (filtered_data,)),
+                (financial_calculator.create_hours_chart, (filtered_data, viewport_width)),
+                (financial_calculator.create_revenue_chart, (filtered_data,))
+            ])
 
             # Calculate total revenue based on filtered data
             total_revenue = sum(project_data['total_revenue'] for project_data in filtered_data.values())
@@ -78,9 +133,7 @@ def register_financials_callbacks(app, data_manager: DataManager):
                 fig_financials,
                 f"Total Revenue: ${total_revenue:,.2f}",
                 fig_hours,
-                fig_revenue,
-                "Calculation complete",
-                False
+                fig_revenue
             ]
         except Exception as e:
             logger.error(f"Error in update_financials: {str(e)}", exc_info=True)
@@ -89,7 +142,5 @@ def register_financials_callbacks(app, data_manager: DataManager):
                 empty_fig,
                 f"Error: {str(e)}",
                 empty_fig,
-                empty_fig,
-                f"Error occurred: {str(e)}",
-                False
+                empty_fig
             ]
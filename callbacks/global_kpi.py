@@ -1,8 +1,10 @@
 from dash.dependencies import Input, Output
+from dash.exceptions import PreventUpdate
 import plotly.graph_objs as go
 import pandas as pd
 
 from data_management import DataManager
+from figure_cache import memoize_figures
 from logging_config import setup_logging
 
 logger = setup_logging()
@@ -15,9 +17,15 @@ def register_global_kpi_callbacks(app, data_manager: DataManager):
         Output('global-kpi-chart', 'figure')],
         [Input('date-range', 'start_date'),
         Input('date-range', 'end_date'),
-        Input('project-filter', 'value')]
+        Input('project-filter', 'value'),
+        Input('data-version', 'data'),
+        Input('tabs', 'value')]
     )
-    def update_global_kpi(start_date, end_date, selected_projects):
+    @memoize_figures(data_manager, 'update_global_kpi')
+    def update_global_kpi(start_date, end_date, selected_projects, data_version, active_tab):
+        if active_tab != 'global-kpi-tab':
+            raise PreventUpdate
+
         start_date = pd.to_datetime(start_date)
         end_date = pd.to_datetime(end_date)
 
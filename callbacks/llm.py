@@ -1,6 +1,7 @@
+import dash
 from dash import html
 from dash.dependencies import Input, Output, State
-from llm_integration import generate_llm_report
+from llm_integration import check_ollama_status, extract_model_names, generate_llm_report
 from data_management import DataManager
 from logging_config import setup_logging
 
@@ -9,6 +10,27 @@ logger = setup_logging()
 def register_llm_callback(app, data_manager: DataManager):
     logger.info("Registering callback...")
 
+    @app.callback(
+        [Output('model-selection', 'options'),
+         Output('model-selection', 'value')],
+        [Input('tabs', 'value')],
+        [State('model-selection', 'value')]
+    )
+    def update_model_options(current_tab, selected_model):
+        # Only ask Ollama for its models once the Reporting tab is opened
+        if current_tab != 'reporting-tab':
+            return dash.no_update, dash.no_update
+
+        ollama_running, available_models = check_ollama_status()
+        if not ollama_running:
+            return [], None
+
+        model_options = [{'label': model, 'value': model} for model in extract_model_names(available_models)]
+        if selected_model is None and model_options:
+            selected_model = model_options[0]['value']
+
+        return model_options, selected_model
+
     @app.callback(
         Output('llm-report-output', 'children'),
         [Input('generate-llm-report', 'n_clicks')],
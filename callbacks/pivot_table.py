@@ -1,7 +1,9 @@
 from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.graph_objs as go
 import pandas as pd
 from dash import dash_table
+from chart_builder import use_webgl
 from data_management import DataManager
 from logging_config import setup_logging
 
@@ -32,9 +34,14 @@ def register_pivot_table_callbacks(app, data_manager: DataManager):
          Input('pivot-values-selector', 'value'),
          Input('pivot-aggfunc-selector', 'value'),
          Input('pivot-chart-type-selector', 'value'),
-         Input('pivot-dataframe-selector', 'value')]
+         Input('pivot-dataframe-selector', 'value'),
+         Input('data-version', 'data'),
+         Input('tabs', 'value')]
     )
-    def update_pivot_table(index, columns, values, aggfunc, chart_type, selected_df):
+    def update_pivot_table(index, columns, values, aggfunc, chart_type, selected_df, data_version, active_tab):
+        if active_tab != 'pivot-tab':
+            raise PreventUpdate
+
         if not all([index, columns, values, aggfunc, selected_df]):
             return go.Figure(), "Please select all required fields"
 
@@ -50,12 +57,12 @@ def register_pivot_table_callbacks(app, data_manager: DataManager):
         if chart_type == 'bar':
             for col in pivot_table.columns:
                 fig.add_trace(go.Bar(x=pivot_table.index, y=pivot_table[col], name=str(col)))
-        elif chart_type == 'line':
-            for col in pivot_table.columns:
-                fig.add_trace(go.Scatter(x=pivot_table.index, y=pivot_table[col], mode='lines+markers', name=str(col)))
-        elif chart_type == 'scatter':
+        elif chart_type in ('line', 'scatter'):
+            # All traces of a chart use the same renderer, so the total number of points decides
+            scatter = go.Scattergl if use_webgl(pivot_table.size) else go.Scatter
+            mode = 'lines+markers' if chart_type == 'line' else 'markers'
             for col in pivot_table.columns:
-                fig.add_trace(go.Scatter(x=pivot_table.index, y=pivot_table[col], mode='markers', name=str(col)))
+                fig.add_trace(scatter(x=pivot_table.index, y=pivot_table[col], mode=mode, name=str(col)))
 
         fig.update_layout(title='Pivot Table Chart', xaxis_title=index[0] if isinstance(index, list) else index,
                           yaxis_title=values[0] if isinstance(values, list) else values)
@@ -1,8 +1,10 @@
-from dash.dependencies import Input, Output
-import plotly.graph_objs as go
+from dash.dependencies import ClientsideFunction, Input, Output, State
+from dash.exceptions import PreventUpdate
 import pandas as pd
 
+from chart_builder import bar, figure
 from data_management import DataManager
+from figure_cache import memoize_figures
 from logging_config import setup_logging
 
 logger = setup_logging()
@@ -16,9 +18,16 @@ def register_portfolio_callbacks(app, data_manager: DataManager):
         [Input('date-range', 'start_date'),
          Input('date-range', 'end_date'),
          Input('project-filter', 'value'),
-         Input('portfolio-hours-height', 'value')]
+         Input('data-version', 'data'),
+         Input('tabs', 'value')],
+        [State('portfolio-hours-height', 'value')]
     )
-    def update_portfolio(start_date, end_date, selected_projects, chart_height):
+    @memoize_figures(data_manager, 'update_portfolio')
+    def update_portfolio(start_date, end_date, selected_projects, data_version, active_tab, chart_height):
+        if active_tab != 'portfolio-tab':
+            raise PreventUpdate
+
+        data_manager.ensure_history(start_date)
         start_date = pd.to_datetime(start_date)
         end_date = pd.to_datetime(end_date)
         
@@ -42,16 +51,16 @@ def register_portfolio_callbacks(app, data_manager: DataManager):
         hours_per_project = hours_per_project.sort_values('unit_amount', ascending=False)
         hours_per_project['unit_amount'] = hours_per_project['unit_amount'].round().astype(int)
         
-        fig_hours = go.Figure(go.Bar(
-            x=hours_per_project['project_name'],
-            y=hours_per_project['unit_amount'],
-            text=hours_per_project['unit_amount'],
-            textposition='auto'
-        ))
-        fig_hours.update_layout(
-            title='Hours Spent per Project',
-            xaxis_title='Project',
-            yaxis_title='Hours',
+        fig_hours = figure(
+            [bar(
+                x=hours_per_project['project_name'],
+                y=hours_per_project['unit_amount'],
+                text=hours_per_project['unit_amount'],
+                textposition='auto'
+            )],
+            title={'text': 'Hours Spent per Project'},
+            xaxis={'title': {'text': 'Project'}},
+            yaxis={'title': {'text': 'Hours'}},
             height=chart_height
         )
         
@@ -62,30 +71,29 @@ def register_portfolio_callbacks(app, data_manager: DataManager):
         tasks_stats['total'] = tasks_stats['opened'] + tasks_stats['closed']
         tasks_stats = tasks_stats.sort_values('total', ascending=False)
         
-        fig_tasks = go.Figure()
-        fig_tasks.add_trace(go.Bar(
-            x=tasks_stats['project_name'],
-            y=tasks_stats['opened'],
-            name='Opened',
-            text=tasks_stats['opened'],
-            textposition='auto'
-        ))
-        fig_tasks.add_trace(go.Bar(
-            x=tasks_stats['project_name'],
-            y=tasks_stats['closed'],
-            name='Closed',
-            text=tasks_stats['closed'],
-            textposition='auto'
-        ))
-        fig_tasks.update_layout(
+        fig_tasks = figure(
+            [bar(
+                x=tasks_stats['project_name'],
+                y=tasks_stats[column],
+                name=name,
+                text=tasks_stats[column],
+                textposition='auto',
+                hovertemplate='<b>%{x}</b><br>%{y} tasks<extra></extra>',
+                hoverlabel=dict(bgcolor="white", font=dict(size=16, family="Rockwell"))
+            ) for column, name in [('opened', 'Opened'), ('closed', 'Closed')]],
             barmode='stack',
-            title='Tasks Opened and Closed per Project',
-            xaxis_title='Project',
-            yaxis_title='Number of Tasks'
-        )
-        fig_tasks.update_traces(
-            hovertemplate='<b>%{x}</b><br>%{y} tasks<extra></extra>',
-            hoverlabel=dict(bgcolor="white", font_size=16, font_family="Rockwell")
+            title={'text': 'Tasks Opened and Closed per Project'},
+            xaxis={'title': {'text': 'Project'}},
+            yaxis={'title': {'text': 'Number of Tasks'}}
         )
         
         return fig_hours, fig_tasks
+
+    # Changing the height only touches the figure layout, so it is done in the browser
+    app.clientside_callback(
+        ClientsideFunction(namespace='oodash', function_name='set_height'),
+        Output('portfolio-hours-chart', 'figure', allow_duplicate=True),
+        [Input('portfolio-hours-height', 'value')],
+        [State('portfolio-hours-chart', 'figure')],
+        prevent_initial_call=True
+    )
@@ -1,8 +1,10 @@
-from dash.dependencies import Input, Output
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import plotly.graph_objs as go
 import pandas as pd
+import dash
+from dash.exceptions import PreventUpdate
 from data_management import DataManager
-from project_analyser import ProjectAnalyser
+from project_analyser import TASKS_PAGE_SIZE, ProjectAnalyser
 from logging_config import setup_logging
 
 logger = setup_logging()
@@ -11,30 +13,110 @@ def register_project_callback(app, data_manager: DataManager):
     logger.info("Registering callback...")
     project_analyser = ProjectAnalyser(data_manager)
 
+    @app.callback(
+        Output('project-selector', 'options'),
+        [Input('project-selector', 'search_value'),
+         Input('last-update-time', 'children')],
+        [State('project-selector', 'value')]
+    )
+    def search_project_selector(search_value, last_update, selected_project):
+        # Same projects as the portfolio filter, but only one can be chosen
+        return data_manager.get_name_index('df_portfolio').options(search_value, selected_project)
+
     @app.callback(
         [Output('project-timeline-chart', 'figure'),
          Output('project-revenue-chart', 'figure'),
-         Output('project-tasks-employees-chart', 'figure'),
          Output('project-total-revenue', 'children'),
          Output('project-period-revenue', 'children')],
         [Input('project-selector', 'value'),
          Input('date-range', 'start_date'),
          Input('date-range', 'end_date'),
          Input('employee-filter', 'value'),
-         Input('man-hours-toggle', 'value')]
+         Input('data-version', 'data'),
+         Input('tabs', 'value')],
+        [State('man-hours-toggle', 'value')]
     )
-    def update_project_charts(selected_project, start_date, end_date, selected_employees, use_man_hours):
+    def update_project_charts(selected_project, start_date, end_date, selected_employees, data_version, active_tab, use_man_hours):
+        if active_tab != 'project-tab':
+            raise PreventUpdate
+
         logger.info(f"Updating project charts for project: {selected_project}")
         if not selected_project:
-            return go.Figure(), go.Figure(), go.Figure(), "", ""
+            return go.Figure(), go.Figure(), "", ""
 
         try:
-            timeline_fig, revenue_fig, tasks_employees_fig, total_revenue_msg, period_revenue_msg = project_analyser.analyse_project(
+            data_manager.ensure_history(start_date)
+            timeline_fig, revenue_fig, total_revenue_msg, period_revenue_msg = project_analyser.analyse_project(
                 selected_project, start_date, end_date, selected_employees, use_man_hours
             )
             
-            return timeline_fig, revenue_fig, tasks_employees_fig, total_revenue_msg, period_revenue_msg
+            return timeline_fig, revenue_fig, total_revenue_msg, period_revenue_msg
         
         except Exception as e:
             logger.error(f"Error in update_project_charts: {str(e)}", exc_info=True)
-            return go.Figure(), go.Figure(), go.Figure(), f"Error: {str(e)}", ""
+            return go.Figure(), go.Figure(), f"Error: {str(e)}", ""
+
+    # Switching between man hours and man days rescales the timeline in the browser
+    app.clientside_callback(
+        ClientsideFunction(namespace='oodash', function_name='set_effort_unit'),
+        Output('project-timeline-chart', 'figure', allow_duplicate=True),
+        [Input('man-hours-toggle', 'value')],
+        [State('project-timeline-chart', 'figure')],
+        prevent_initial_call=True
+    )
+
+    @app.callback(
+        [Output('project-tasks-employees-chart', 'figure'),
+         Output('tasks-offset', 'data'),
+         Output('tasks-page-label', 'children'),
+         Output('tasks-page-prev', 'disabled'),
+         Output('tasks-page-next', 'disabled')],
+        [Input('project-selector', 'value'),
+         Input('date-range', 'start_date'),
+         Input('date-range', 'end_date'),
+         Input('employee-filter', 'value'),
+         Input('data-version', 'data'),
+         Input('tasks-page-prev', 'n_clicks'),
+         Input('tasks-page-next', 'n_clicks'),
+         Input('project-tasks-employees-chart', 'relayoutData'),
+         Input('tabs', 'value')],
+        [State('tasks-offset', 'data')]
+    )
+    def update_tasks_employees_chart(selected_project, start_date, end_date, selected_employees, data_version,
+                                     prev_clicks, next_clicks, relayout_data, active_tab, offset):
+        if active_tab != 'project-tab':
+            raise PreventUpdate
+
+        # Only the shown window of tasks is sent, paging or panning fetches the next one
+        if not selected_project:
+            return go.Figure(), 0, "", True, True
+
+        offset = offset or 0
+        ctx = dash.callback_context
+        triggered = ctx.triggered[0]['prop_id'] if ctx.triggered else None
+        if triggered == 'tasks-page-prev.n_clicks':
+            offset -= TASKS_PAGE_SIZE
+        elif triggered == 'tasks-page-next.n_clicks':
+            offset += TASKS_PAGE_SIZE
+        elif triggered == 'project-tasks-employees-chart.relayoutData':
+            # The x axis is task positions within the window, shift it by the tasks panned past
+            if not relayout_data or 'xaxis.range[0]' not in relayout_data:
+                raise PreventUpdate
+            shift = round(relayout_data['xaxis.range[0]'] + 0.5)
+            if not shift:
+                raise PreventUpdate
+            offset += shift
+        elif triggered not in ('data-version.data', 'tabs.value'):
+            offset = 0
+
+        try:
+            data_manager.ensure_history(start_date)
+            fig, offset, task_count = project_analyser.analyse_tasks_employees(
+                selected_project, start_date, end_date, selected_employees, offset
+            )
+        except Exception as e:
+            logger.error(f"Error in update_tasks_employees_chart: {str(e)}", exc_info=True)
+            return go.Figure(), 0, f"Error: {str(e)}", True, True
+
+        label = f"Tasks {offset + 1}-{min(offset + TASKS_PAGE_SIZE, task_count)} of {task_count}" if task_count else ""
+        return fig, offset, label, offset <= 0, offset + TASKS_PAGE_SIZE >= task_count
@@ -1,4 +1,5 @@
 from dash.dependencies import Input, Output
+from dash.exceptions import PreventUpdate
 from data_management import DataManager
 from data_quality_reporter import DataQualityReporter
 from logging_config import setup_logging
@@ -12,15 +13,24 @@ def register_reporting_callback(app, data_manager: DataManager):
     @app.callback(
         Output('data-quality-report', 'children'),
         [Input('date-range', 'start_date'),
-        Input('date-range', 'end_date')]
+        Input('date-range', 'end_date'),
+        Input('data-version', 'data'),
+        Input('tabs', 'value')]
     )
-    def update_data_quality_report(start_date, end_date):
+    def update_data_quality_report(start_date, end_date, data_version, active_tab):
+        if active_tab != 'reporting-tab':
+            raise PreventUpdate
         return data_quality_reporter.generate_data_quality_report(start_date, end_date)
 
     @app.callback(
         Output('long-tasks-list', 'children'),
         [Input('date-range', 'start_date'),
-        Input('date-range', 'end_date')]
+        Input('date-range', 'end_date'),
+        Input('data-version', 'data'),
+        Input('tabs', 'value')]
     )
-    def update_long_tasks_list(start_date, end_date):
+    def update_long_tasks_list(start_date, end_date, data_version, active_tab):
+        if active_tab != 'reporting-tab':
+            raise PreventUpdate
+        data_manager.ensure_history(start_date)
         return data_quality_reporter.generate_long_tasks_list(start_date, end_date)
@@ -57,7 +57,8 @@ def register_settings_callbacks(app, data_manager: DataManager):
     @app.callback(
         Output('job-costs-table', 'data', allow_duplicate=True),
         [Input('tabs', 'value')],
-        prevent_initial_call=True
+        # Also runs when the Settings tab is first built
+        prevent_initial_call='initial_duplicate'
     )
     def update_job_costs_table(current_tab):
         if current_tab != 'Settings':
@@ -0,0 +1,135 @@
+import hmac
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+from flask import jsonify, request
+
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+OPERATIONS = ('create', 'write', 'unlink')
+
+@dataclass
+class ChangeEvent:
+    model: str
+    operation: str
+    ids: List[int] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ChangeEvent':
+        operation = data.get('operation')
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        if not data.get('model'):
+            raise ValueError("Missing model")
+        return cls(model=data['model'], operation=operation, ids=[int(record_id) for record_id in data.get('ids', [])])
+
+class ChangeBatcher:
+    """
+    Collects Odoo change notifications and hands them to the DataManager in batches,
+    so a burst of edits turns into one fetch per model. Runs in a background thread
+    started on the first submit.
+    """
+    def __init__(self, data_manager, flush_interval: float = 2.0, max_pending: int = 100000):
+        self.data_manager = data_manager
+        self.flush_interval = flush_interval
+        # Ids kept while the dashboard data is not loaded, beyond that they are left to the next sync
+        self.max_pending = max_pending
+        self._pending: Dict[str, Dict[str, Set[int]]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def submit(self, events: List[ChangeEvent]):
+        with self._lock:
+            for event in events:
+                changes = self._pending.setdefault(event.model, {'upsert': set(), 'unlink': set()})
+                if event.operation == 'unlink':
+                    changes['unlink'].update(event.ids)
+                    changes['upsert'].difference_update(event.ids)
+                else:
+                    changes['upsert'].update(event.ids)
+                    changes['unlink'].difference_update(event.ids)
+
+            pending_ids = sum(len(ids) for changes in self._pending.values() for ids in changes.values())
+            if pending_ids > self.max_pending:
+                logger.warning(f"{pending_ids} changes pending, dropping them, the next sync fetches them")
+                self._pending = {}
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='change-batcher', daemon=True)
+                self._thread.start()
+
+        self._wakeup.set()
+
+    def flush(self) -> bool:
+        """
+        Apply the pending changes. Returns False when they are kept for a later flush.
+        """
+        # Keep the events until the dashboard data is loaded, there is nothing to apply them to yet
+        if not self.data_manager.data_loaded:
+            return False
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return True
+
+        try:
+            self.data_manager.apply_changes(pending)
+        except Exception as e:
+            logger.error(f"Error applying changes, keeping them for the next batch: {e}", exc_info=True)
+            with self._lock:
+                for model, changes in pending.items():
+                    merged = self._pending.setdefault(model, {'upsert': set(), 'unlink': set()})
+                    merged['upsert'].update(changes['upsert'] - merged['unlink'])
+                    merged['unlink'].update(changes['unlink'] - merged['upsert'])
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # Give related notifications a moment to arrive so they end up in the same batch
+            time.sleep(self.flush_interval)
+            self._wakeup.clear()
+            if not self.flush():
+                # Try the kept changes again after the next interval instead of waiting for another submit
+                self._wakeup.set()
+
+def register_change_feed(server, change_batcher: ChangeBatcher):
+    """
+    Add the webhook Odoo (or a message-queue consumer) posts change notifications to:
+
+        POST /api/odoo/changes
+        X-Change-Feed-Token: <CHANGE_FEED_TOKEN>
+        {"events": [{"model": "account.analytic.line", "operation": "write", "ids": [42]}]}
+
+    The endpoint is disabled unless CHANGE_FEED_TOKEN is set.
+    """
+    token = os.getenv('CHANGE_FEED_TOKEN')
+    if not token:
+        logger.info("CHANGE_FEED_TOKEN not set, change feed disabled")
+        return
+
+    @server.route('/api/odoo/changes', methods=['POST'])
+    def receive_changes():
+        if not hmac.compare_digest(request.headers.get('X-Change-Feed-Token', ''), token):
+            return jsonify({'error': 'Invalid token'}), 401
+
+        payload = request.get_json(silent=True) or {}
+        try:
+            events = [ChangeEvent.from_dict(event) for event in payload.get('events', [])]
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        change_batcher.submit(events)
+        logger.info(f"Received {len(events)} change events")
+        return jsonify({'accepted': len(events)}), 202
+
+    logger.info("Change feed enabled at /api/odoo/changes")
@@ -0,0 +1,49 @@
+"""
+Stand-in for an Odoo change feed, posts change notifications to a running dashboard.
+
+    python change_feed_producer.py account.analytic.line write 42 43
+    python change_feed_producer.py account.analytic.line unlink 42
+    python change_feed_producer.py account.analytic.line write 42 --repeat 10 --interval 1
+"""
+import argparse
+import json
+import os
+import time
+import urllib.request
+
+from dotenv import find_dotenv, load_dotenv
+
+from change_feed import OPERATIONS
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+load_dotenv(find_dotenv(filename='cfg/.env', raise_error_if_not_found=True))
+
+def post_events(url, token, events):
+    body = json.dumps({'events': events}).encode('utf-8')
+    req = urllib.request.Request(url, data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'X-Change-Feed-Token': token,
+    })
+    with urllib.request.urlopen(req) as response:
+        return json.load(response)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('model', help="Odoo model, e.g. account.analytic.line")
+    parser.add_argument('operation', choices=OPERATIONS)
+    parser.add_argument('ids', type=int, nargs='+')
+    parser.add_argument('--repeat', type=int, default=1, help="Number of notifications to send")
+    parser.add_argument('--interval', type=float, default=1.0, help="Seconds between notifications")
+    parser.add_argument('--url', default=f"http://{os.getenv('SERVICE_URL')}:{os.getenv('SERVICE_PORT')}/api/odoo/changes")
+    args = parser.parse_args()
+
+    events = [{'model': args.model, 'operation': args.operation, 'ids': args.ids}]
+    for i in range(args.repeat):
+        if i:
+            time.sleep(args.interval)
+        logger.info(f"Sent {events}: {post_events(args.url, os.getenv('CHANGE_FEED_TOKEN', ''), events)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import os
+from typing import Dict, List, Optional
+
+import pandas as pd
+import plotly.io as pio
+# Private plotly helpers graph_objs coerces arrays with, verified up to the version pinned in requirements.txt.
+# An import error here means they moved: check figure() against go.Figure before raising the pin.
+from _plotly_utils.basevalidators import copy_to_readonly_numpy_array, is_homogeneous_array
+
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+try:
+    from _plotly_utils.utils import convert_to_base64
+except ImportError:
+    # Loud rather than silently sending larger responses
+    logger.warning("plotly typed-array encoding not found, figure arrays are sent as plain lists")
+
+    def convert_to_base64(obj):
+        pass
+
+OTHER_LABEL = 'Other'
+
+STRING_ARRAY_PROPERTIES = ('text', 'hovertext')
+
+_template = None
+
+def layout_template() -> Dict:
+    """
+    The default plotly template as a plain dict, built once. go.Figure() copies it into every figure.
+    """
+    global _template
+    if _template is None:
+        _template = pio.templates[pio.templates.default].to_plotly_json() if pio.templates.default else {}
+    return _template
+
+def trace(trace_type: str, **properties) -> Dict:
+    """
+    A trace as a plain dict. Series, indexes and frames are turned into numpy arrays the way
+    graph_objs does, but properties are not validated, so only use names plotly knows.
+    """
+    for name, value in properties.items():
+        if name in STRING_ARRAY_PROPERTIES:
+            # Coerced to strings like plotly's string validator does
+            if is_homogeneous_array(value):
+                properties[name] = copy_to_readonly_numpy_array(value, kind='U')
+            elif isinstance(value, (list, tuple)):
+                properties[name] = [None if item is None else str(item) for item in value]
+        elif is_homogeneous_array(value):
+            properties[name] = copy_to_readonly_numpy_array(value)
+    return {'type': trace_type, **properties}
+
+def bar(**properties) -> Dict:
+    return trace('bar', **properties)
+
+def figure(traces: List[Dict], **layout) -> Dict:
+    """
+    A figure as a plain dict, producing the same JSON as go.Figure(traces, layout) without validating
+    every property. Layout properties must be given nested, e.g. xaxis={'title': {'text': 'Date'}}.
+    """
+    # Like update_layout, a property set to None is left out
+    layout = {name: value for name, value in layout.items() if value is not None}
+    data = {'data': traces, 'layout': layout}
+    convert_to_base64(data)
+    if layout_template():
+        layout = {'template': layout_template(), **layout}
+    return {'data': data['data'], 'layout': layout}
+
+def default_top_n() -> int:
+    return int(os.getenv('CHART_TOP_N') or '20')
+
+def bucket_top_n(data: pd.DataFrame, series_column: str, value_column: str, top_n: Optional[int] = None) -> pd.DataFrame:
+    """
+    Keep the top_n values of series_column by total value_column and relabel the rest as "Other",
+    so a chart with one trace per series gets at most top_n + 1 traces whatever the cardinality.
+    The folded series are still reachable by narrowing the project or employee filter.
+    top_n defaults to CHART_TOP_N, 0 keeps every series.
+    """
+    top_n = default_top_n() if top_n is None else top_n
+    if top_n <= 0 or data.empty or data[series_column].nunique() <= top_n + 1:
+        return data
+
+    totals = data.groupby(series_column)[value_column].sum().abs()
+    keep = totals.nlargest(top_n).index
+    logger.debug(f"Folding {len(totals) - top_n} {series_column} series into {OTHER_LABEL}")
+
+    data = data.copy()
+    data[series_column] = data[series_column].where(data[series_column].isin(keep), OTHER_LABEL)
+    return data
+
+def use_webgl(point_count: int) -> bool:
+    """
+    Whether a scatter or line chart of point_count points in total should use WebGL (scattergl) traces,
+    SVG gets too slow to pan and zoom above WEBGL_POINT_THRESHOLD (default 10000) points, 0 always uses SVG.
+    """
+    threshold = int(os.getenv('WEBGL_POINT_THRESHOLD') or '10000')
+    return 0 < threshold < point_count
+
+def series_order(values) -> List:
+    """Unique series in order of appearance, with "Other" last."""
+    series = list(pd.unique(pd.Series(values)))
+    if OTHER_LABEL in series:
+        series.remove(OTHER_LABEL)
+        series.append(OTHER_LABEL)
+    return series
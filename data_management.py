@@ -1,15 +1,53 @@
+import ast
 from dataclasses import dataclass, field
 import os
 import pickle
 import json
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
+import diskcache
+import numpy as np
 import pandas as pd
-from odoo import fetch_and_process_data
+from odoo import MODELS, fetch_and_process_data, fetch_history, fetch_records
 from logging_config import setup_logging
+from search_index import NameSearchIndex, TokenIndex
+from sync_checkpoint import SyncCheckpoint
 
 logger = setup_logging()
 
+FRAME_NAMES = ('portfolio', 'employees', 'sales', 'timesheet', 'tasks')
+
+# Frames whose record names are searched by keyword (the Sales task filter), by the Odoo model they hold
+TOKEN_INDEXED_FRAMES = {'project.task': 'df_tasks'}
+
+def extract_job_title(employee) -> str:
+    if 'job_id' in employee and isinstance(employee['job_id'], str):
+        try:
+            job_id_list = ast.literal_eval(employee['job_id'])
+            return job_id_list[1] if len(job_id_list) > 1 else 'Unknown'
+        except (ValueError, SyntaxError, IndexError) as e:
+            logger.error(f"Job title not found: {e}")
+            return 'Unknown'
+    elif 'job_title' in employee:
+        return employee['job_title']
+    else:
+        logger.warning(f"Job title not found: {employee}")
+        return 'Unknown'
+
+def parse_many2one(value) -> Optional[tuple]:
+    """
+    An Odoo many2one as (id, name), None when it is empty.
+    Frames that went through merge_new_data hold them as strings such as "[12, 'Name']".
+    """
+    if isinstance(value, str) and value.startswith('['):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return None
+    return tuple(value) if isinstance(value, (list, tuple)) and value else None
+
 @dataclass
 class DataManager:
     DATA_FILE: str = 'data/odoo_data.pkl'
@@ -17,6 +55,9 @@ class DataManager:
     JOB_COSTS_FILE: str = 'data/job_costs.json'
     FINANCIALS_FILE: str = 'data/financials_data.json'
     LAST_CALCULATION_FILE: str = 'data/last_financials_calculation.json'
+    SYNC_CHECKPOINT_DIR: str = 'data/sync'
+    HISTORY_START_FILE: str = 'data/history_start.json'
+    DATA_VERSION_DIR: str = 'data/data_version'
 
     df_portfolio: pd.DataFrame = field(default_factory=pd.DataFrame)
     df_employees: pd.DataFrame = field(default_factory=pd.DataFrame)
@@ -28,6 +69,33 @@ class DataManager:
     last_update: Optional[datetime] = None
     data_loaded: bool = field(default_factory=bool)
     data = None
+    # When false the web process never talks to Odoo and only picks up snapshots written by sync.py
+    sync_in_web: bool = field(default_factory=lambda: (os.getenv('ODOO_SYNC_IN_WEB') or 'true').lower() == 'true')
+    snapshot_mtime: Optional[float] = None
+    # Increases with every snapshot written, lets clients tell whether they are showing current data
+    data_version: int = 0
+    # Days of timesheets, sales and tasks loaded by a full sync, older history is fetched on demand. 0 (default) loads everything.
+    # Lifetime figures such as the total project revenue and the data quality reports only cover the loaded history.
+    history_days: int = field(default_factory=lambda: int(os.getenv('HISTORY_WINDOW_DAYS') or '0'))
+    history_start: Optional[datetime] = None
+    _reload_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _update_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    # Seconds pushed changes are collected in memory before the snapshot is written
+    snapshot_write_delay: float = 30.0
+    _snapshot_timer: Optional[threading.Timer] = field(default=None, repr=False)
+    _snapshot_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    # Views derived from the snapshot by build_derived
+    _derived_sources: tuple = field(default=(), repr=False)
+    _job_costs_generation: int = field(default=0, repr=False)
+    _enriched_timesheet: pd.DataFrame = field(default_factory=pd.DataFrame, repr=False)
+    # Project-sorted enriched timesheet, row range per project and lifetime revenue per project,
+    # replaced as one tuple so a reader never combines offsets with a timesheet they were not built for
+    _project_index: tuple = field(default_factory=lambda: (pd.DataFrame(), {}, {}), repr=False)
+    _index_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    # Dropdown search indexes per dimension frame, with the frame they were built from
+    _name_indexes: Dict = field(default_factory=dict, repr=False)
+    # Keyword indexes per frame in TOKEN_INDEXED_FRAMES, with the frame they index
+    _token_indexes: Dict = field(default_factory=dict, repr=False)
 
     def __post_init__(self):
         self.data_loaded = False
@@ -42,6 +110,7 @@ class DataManager:
         logger.info('Loading data with force = %s', force)
         self.data, self.last_update = self.load_or_fetch_data(force)
         self.df_portfolio, self.df_employees, self.df_sales, self.df_timesheet, self.df_tasks = self.data
+        self.history_start = self.get_history_start()
         self.job_costs = self.load_job_costs()
         self.financials_data = self.load_financials_data()
 
@@ -52,6 +121,33 @@ class DataManager:
         self.print_data_summary()
         logger.info("All data loaded successfully")
 
+    def reload_if_changed(self):
+        """
+        Hot-swap the in-memory data when another process (sync.py) has written a newer snapshot.
+        """
+        if not self.data_loaded or not os.path.exists(self.DATA_FILE):
+            return False
+
+        if self.snapshot_mtime is not None and os.path.getmtime(self.DATA_FILE) <= self.snapshot_mtime:
+            return False
+
+        with self._reload_lock:
+            mtime = os.path.getmtime(self.DATA_FILE)
+            if self.snapshot_mtime is not None and mtime <= self.snapshot_mtime:
+                return False
+
+            logger.info("New snapshot detected, reloading data")
+            cached_data = self.load_cached_data()
+            if cached_data is None:
+                return False
+
+            self.df_portfolio, self.df_employees, self.df_sales, self.df_timesheet, self.df_tasks = cached_data
+            self.last_update = self.get_last_update_time()
+            self.history_start = self.get_history_start()
+            self.process_job_titles()
+            self.print_data_summary()
+            return True
+
     def process_job_titles(self):
         if 'job_title' in self.df_employees.columns:
             unique_job_titles = self.df_employees['job_title'].unique()
@@ -79,6 +175,8 @@ class DataManager:
         logger.info(f"Job Costs: {len(self.job_costs)} job titles")
         logger.info(f"Financials: {len(self.financials_data)} project financials")
         logger.info(f"Last Update: {self.last_update}")
+        logger.info(f"Data Version: {self.data_version}")
+        logger.info(f"History loaded from: {self.history_start or 'the beginning'}")
         logger.info("--- End of Summary ---\n")
 
     def serialise_dataframes(self, data = None) -> List[Dict]:
@@ -110,20 +208,155 @@ class DataManager:
         with open(self.LAST_UPDATE_FILE, 'w') as f:
             json.dump({'time': time.isoformat()}, f)
 
+    def get_history_start(self) -> Optional[datetime]:
+        if os.path.exists(self.HISTORY_START_FILE):
+            with open(self.HISTORY_START_FILE, 'r') as f:
+                history_start = json.load(f)['time']
+            return datetime.fromisoformat(history_start) if history_start else None
+        return None
+
+    def set_history_start(self, time: Optional[datetime]):
+        with open(self.HISTORY_START_FILE, 'w') as f:
+            json.dump({'time': time.isoformat() if time else None}, f)
+        self.history_start = time
+
+    def ensure_history(self, start_date) -> bool:
+        """
+        Make sure data from start_date on is loaded. History before the loaded window is fetched
+        from Odoo, from the start of that month, and merged into the snapshot.
+        Returns True when history was fetched. With in-process sync disabled only sync.py fetches.
+        """
+        if not self.sync_in_web or start_date is None or self.history_start is None:
+            return False
+
+        start_date = pd.to_datetime(start_date).to_pydatetime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        if start_date >= self.history_start:
+            return False
+
+        with self._update_lock:
+            # Another callback may have fetched it while we were waiting
+            if start_date >= self.history_start:
+                return False
+
+            logger.info(f"Fetching history from {start_date} to {self.history_start}")
+            history = fetch_history(start_date, self.history_start, self.df_portfolio, self.df_employees)
+            if history is None:
+                logger.error("Failed to fetch history")
+                return False
+
+            df_sales, df_timesheet, df_tasks = self.merge_new_data([self.df_sales, self.df_timesheet, self.df_tasks], history)
+            data = [self.df_portfolio, self.df_employees, df_sales, df_timesheet, df_tasks]
+            self.save_cached_data(data)
+            self.set_history_start(start_date)
+            self.data = data
+            self.df_sales, self.df_timesheet, self.df_tasks = df_sales, df_timesheet, df_tasks
+            logger.info(f"History loaded from {start_date}")
+            return True
+
+    def apply_changes(self, changes: Dict[str, Dict[str, Set[int]]]):
+        """
+        Apply change notifications collected by change_feed.ChangeBatcher: {model: {'upsert': ids, 'unlink': ids}}.
+        Created and written records are fetched by id, unlinked ones are dropped. Only the frames of the models
+        in the batch are merged, into new frames that replace the current ones, and the snapshot write is
+        debounced, see schedule_snapshot_write.
+        """
+        if not self.sync_in_web:
+            logger.warning("In-process sync is disabled, ignoring pushed changes")
+            return
+
+        models = [model for model, _ in MODELS]
+        unknown_models = set(changes) - set(models)
+        if unknown_models:
+            logger.warning(f"Ignoring changes for unknown models: {unknown_models}")
+
+        upserts = {model: ids['upsert'] for model, ids in changes.items() if model in models and ids['upsert']}
+
+        with self._update_lock:
+            data = [self.df_portfolio, self.df_employees, self.df_sales, self.df_timesheet, self.df_tasks]
+            new_data = fetch_records(upserts, self.df_portfolio, self.df_employees) if upserts else None
+
+            for i, model in enumerate(models):
+                if model in upserts:
+                    data[i] = self.merge_new_data([data[i]], [new_data[i]])[0]
+                unlinked = changes.get(model, {}).get('unlink')
+                if unlinked and 'id' in data[i].columns:
+                    data[i] = data[i][~data[i]['id'].isin(unlinked)]
+
+            # Frames the batch did not touch stay the same objects, so the views derived from them are kept
+            self.data = data
+            self.df_portfolio, self.df_employees, self.df_sales, self.df_timesheet, self.df_tasks = data
+            self.data_version = self.next_data_version()
+            self.update_token_indexes(changes)
+
+        self.schedule_snapshot_write()
+
+        logger.info("Applied changes: " + ", ".join(
+            f"{model} {len(ids['upsert'])} fetched, {len(ids['unlink'])} removed" for model, ids in changes.items() if model in models
+        ))
+
+    def schedule_snapshot_write(self):
+        """
+        Write the snapshot snapshot_write_delay seconds from now, so the batches applied in between are saved once.
+        Changes not written yet when the process stops are fetched again by the next incremental sync.
+        """
+        with self._snapshot_lock:
+            if self._snapshot_timer is None:
+                self._snapshot_timer = threading.Timer(self.snapshot_write_delay, self.write_pending_snapshot)
+                self._snapshot_timer.daemon = True
+                self._snapshot_timer.start()
+
+    def write_pending_snapshot(self):
+        with self._snapshot_lock:
+            self._snapshot_timer = None
+
+        with self._update_lock:
+            logger.info(f"Saving snapshot of data version {self.data_version}")
+            self.save_cached_data(self.data, self.data_version)
+
     def load_cached_data(self) -> Optional[List[pd.DataFrame]]:
         if os.path.exists(self.DATA_FILE):
+            mtime = os.path.getmtime(self.DATA_FILE)
             with open(self.DATA_FILE, 'rb') as f:
                 data = pickle.load(f)
+            self.snapshot_mtime = mtime
+            # Snapshots written before versioning are a plain list of frames
+            if isinstance(data, dict):
+                self.data_version = data['version']
+                data = data['frames']
             return self.deserialise_dataframes(data)
         return None
 
-    def save_cached_data(self, data: List[pd.DataFrame]):
-        with open(self.DATA_FILE, 'wb') as f:
-            pickle.dump(self.serialise_dataframes(data), f)
+    def save_cached_data(self, data: List[pd.DataFrame], version: Optional[int] = None):
+        if version is None:
+            version = self.next_data_version()
+
+        # Write to a temporary file first so a reader never sees a half written snapshot
+        tmp_file = f"{self.DATA_FILE}.tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump({'version': version, 'frames': self.serialise_dataframes(data)}, f)
+        os.replace(tmp_file, self.DATA_FILE)
+        self.snapshot_mtime = os.path.getmtime(self.DATA_FILE)
+        self.data_version = version
+
+    def next_data_version(self) -> int:
+        """
+        Allocate the version of the next snapshot. The last allocated version is kept in a small disk cache,
+        read and increased in one transaction, so the web process and sync.py never hand out the same version.
+        """
+        with diskcache.Cache(self.DATA_VERSION_DIR) as versions:
+            with versions.transact():
+                version = max(self.data_version, versions.get('version', 0)) + 1
+                versions.set('version', version)
+        return version
 
     def merge_new_data(self, old_data: List[pd.DataFrame], new_data: List[pd.DataFrame]) -> List[pd.DataFrame]:
+        """
+        Merge freshly fetched frames into the loaded ones, fetched records replace loaded ones with the same id.
+        Returns new frames, the given ones are left untouched as callbacks may be reading them.
+        """
         merged_data = []
         for old_df, new_df in zip(old_data, new_data):
+            old_df, new_df = old_df.copy(), new_df.copy()
             for df in [old_df, new_df]:
                 for col in df.columns:
                     if df[col].dtype == 'object':
@@ -156,6 +389,162 @@ class DataManager:
         with open(self.JOB_COSTS_FILE, 'w') as f:
             json.dump(self.job_costs, f)
 
+        # Revenue in the enriched timesheet depends on the job costs
+        self._job_costs_generation += 1
+
+    def get_enriched_timesheet(self) -> pd.DataFrame:
+        """
+        df_timesheet with task_name, job_title and revenue per line, see build_derived.
+        """
+        self.build_derived()
+        return self._enriched_timesheet
+
+    def get_project_timesheet(self, project_name: str) -> pd.DataFrame:
+        """
+        Enriched timesheet lines of one project, sliced from a project-sorted copy.
+        """
+        self.build_derived()
+        project_timesheet, offsets, _ = self._project_index
+        start, end = offsets.get(project_name, (0, 0))
+        return project_timesheet.iloc[start:end]
+
+    def get_project_revenue(self, project_name: str) -> float:
+        """
+        Lifetime revenue of a project.
+        """
+        self.build_derived()
+        project_timesheet, offsets, project_revenue = self._project_index
+        revenue = project_revenue.get(project_name)
+        if revenue is None:
+            start, end = offsets.get(project_name, (0, 0))
+            revenue = float(project_timesheet['revenue'].iloc[start:end].sum()) if end > start else 0.0
+            project_revenue[project_name] = revenue
+        return revenue
+
+    def get_employee_daily_rates(self) -> Dict[str, float]:
+        """
+        Daily revenue rate per employee name, from the job title and the job costs.
+        The first employee with a given name is used.
+        """
+        daily_rates = {}
+        for _, employee in self.df_employees.iterrows():
+            if employee['name'] in daily_rates:
+                continue
+
+            job_title = extract_job_title(employee)
+            try:
+                daily_rates[employee['name']] = float(self.job_costs.get(job_title, {}).get('revenue') or 0)
+            except (ValueError, AttributeError):
+                logger.warning(f"Invalid revenue data for job title: {job_title}")
+                daily_rates[employee['name']] = 0.0
+        return daily_rates
+
+    def get_name_index(self, frame_name: str) -> NameSearchIndex:
+        """
+        Search index over the names of a dimension frame (df_portfolio, df_employees), rebuilt when the frame is replaced.
+        """
+        frame = getattr(self, frame_name)
+        built_from, index = self._name_indexes.get(frame_name, (None, None))
+        if built_from is not frame:
+            index = NameSearchIndex(frame['name'] if 'name' in frame.columns else [])
+            self._name_indexes[frame_name] = (frame, index)
+        return index
+
+    def get_token_index(self, frame_name: str) -> TokenIndex:
+        """
+        Keyword index from the words of the names in a frame of TOKEN_INDEXED_FRAMES to Odoo ids.
+        Built when a snapshot is loaded, apply_changes keeps it up to date.
+        """
+        frame = getattr(self, frame_name)
+        with self._index_lock:
+            built_from, index = self._token_indexes.get(frame_name, (None, None))
+            if built_from is not frame:
+                has_names = {'id', 'name'} <= set(frame.columns)
+                index = TokenIndex(frame['id'] if has_names else [], frame['name'] if has_names else [])
+                self._token_indexes[frame_name] = (frame, index)
+                logger.debug(f"Built keyword index of {len(index)} {frame_name} names")
+            return index
+
+    def update_token_indexes(self, changes: Dict[str, Dict[str, Set[int]]]):
+        """
+        Re-index the records apply_changes fetched or dropped, instead of rebuilding the indexes for the new frames.
+        Indexes not built yet are left to be built on first use.
+        """
+        with self._index_lock:
+            for model, frame_name in TOKEN_INDEXED_FRAMES.items():
+                frame = getattr(self, frame_name)
+                built_from, index = self._token_indexes.get(frame_name, (None, None))
+                if index is None or not {'id', 'name'} <= set(frame.columns):
+                    self._token_indexes.pop(frame_name, None)
+                    continue
+
+                model_changes = changes.get(model, {})
+                if model_changes.get('unlink'):
+                    index.remove(model_changes['unlink'])
+                if model_changes.get('upsert'):
+                    upserted = frame[frame['id'].isin(model_changes['upsert'])]
+                    index.update(upserted['id'], upserted['name'])
+                self._token_indexes[frame_name] = (frame, index)
+
+    def build_derived(self):
+        """
+        Build the views derived from the snapshot, once per timesheet, tasks, employees and job costs:
+        the enriched timesheet, its project index and the lifetime revenue per project.
+        Callbacks read these instead of merging the frames on every call.
+        """
+        sources = (self.df_timesheet, self.df_tasks, self.df_employees, self._job_costs_generation)
+        if self._derived_sources and all(current is built for current, built in zip(sources, self._derived_sources)):
+            return
+
+        with self._index_lock:
+            if self._derived_sources and all(current is built for current, built in zip(sources, self._derived_sources)):
+                return
+
+            timesheet = self.df_timesheet.copy()
+            if not timesheet.empty:
+                # Lines with an unreadable date become NaT and drop out of every date range
+                if 'date' in timesheet.columns:
+                    timesheet['date'] = pd.to_datetime(timesheet['date'], errors='coerce')
+
+                task_names = {}
+                if {'id', 'name'} <= set(self.df_tasks.columns):
+                    task_names = dict(zip(self.df_tasks['id'], self.df_tasks['name']))
+
+                # Many lines share a task, parse every task_id once
+                parsed_names = {}
+                def task_name(task_id):
+                    key = tuple(task_id) if isinstance(task_id, list) else task_id
+                    if key not in parsed_names:
+                        task = parse_many2one(task_id)
+                        parsed_names[key] = task_names.get(task[0], task[1] if len(task) > 1 else task[0]) if task else 'Unknown'
+                    return parsed_names[key]
+
+                timesheet['task_name'] = timesheet['task_id'].map(task_name) if 'task_id' in timesheet.columns else 'Unknown'
+
+                job_titles = {}
+                for _, employee in self.df_employees.iterrows():
+                    job_titles.setdefault(employee['name'], extract_job_title(employee))
+                timesheet['job_title'] = timesheet['employee_name'].map(job_titles).fillna('Unknown')
+
+                daily_rates = timesheet['employee_name'].map(self.get_employee_daily_rates())
+                if daily_rates.isna().any():
+                    logger.warning(f"{daily_rates.isna().sum()} timesheet entries of employees not found in employees data")
+                timesheet['revenue'] = (timesheet['unit_amount'] / 8) * daily_rates.fillna(0)  # Convert hours to days
+
+            if 'project_name' not in timesheet.columns:
+                project_timesheet, offsets = timesheet, {}
+            else:
+                project_timesheet = timesheet.sort_values('project_name', kind='stable', na_position='last')
+                project_names = project_timesheet['project_name'].to_numpy()
+                valid = int(project_timesheet['project_name'].notna().sum())
+                starts = np.concatenate(([0], np.flatnonzero(project_names[1:valid] != project_names[:valid - 1]) + 1)) if valid else []
+                ends = list(starts[1:]) + [valid]
+                offsets = {project_names[start]: (int(start), int(end)) for start, end in zip(starts, ends)}
+
+            self._enriched_timesheet = timesheet
+            self._project_index = (project_timesheet, offsets, {})
+            self._derived_sources = sources
+            logger.debug(f"Built enriched timesheet of {len(timesheet)} lines for {len(offsets)} projects")
 
     def load_or_fetch_data(self, force: bool = False) -> tuple:
         cached_data = self.load_cached_data()
@@ -163,31 +552,109 @@ class DataManager:
         current_time = datetime.now()
 
         if cached_data is None or last_update is None:
+            if not self.sync_in_web:
+                logger.warning("No snapshot found and in-process sync is disabled. Run `python sync.py --full`.")
+                return cached_data or [pd.DataFrame() for _ in FRAME_NAMES], current_time
+
             logger.info("No cached data found. Fetching all data...")
-            new_data = fetch_and_process_data()
-            if new_data and all(df is not None for df in new_data):
-                self.save_cached_data(new_data)
-                self.set_last_update_time(current_time)
-                return new_data, current_time
+            summary = self.fetch_and_save(None, None)
+            if summary['success']:
+                return self.data, self.last_update
             else:
                 logger.error("Failed to fetch data.")
-                return [pd.DataFrame() for _ in range(5)], current_time
+                return [pd.DataFrame() for _ in FRAME_NAMES], current_time
 
         logger.info(f"Loading cached data from {last_update}")
-        
+
+        if not self.sync_in_web:
+            return cached_data, last_update
+
         if force or (current_time - last_update) > timedelta(days=1):
             logger.info("Cached data is old or force refresh requested. Fetching update...")
-            new_data = fetch_and_process_data(last_update - timedelta(hours=3))
-            if new_data and all(df is not None for df in new_data):
-                merged_data = self.merge_new_data(cached_data, new_data)
-                self.save_cached_data(merged_data)
-                self.set_last_update_time(current_time)
-                return merged_data, current_time
+            summary = self.fetch_and_save(cached_data, last_update)
+            if summary['success']:
+                return self.data, self.last_update
             else:
                 logger.error("Failed to fetch update. Using cached data.")
-        
+
         return cached_data, last_update
 
+    def sync(self, full: bool = False, restart: bool = False) -> Dict:
+        """
+        Fetch from Odoo, merge with the cached snapshot and persist it, without loading the dashboard.
+        Used by sync.py so the fetch can run outside the web process.
+        An interrupted full sync is resumed from its checkpoint unless restart is set.
+        """
+        if restart:
+            logger.info("Discarding the checkpoint of a previous full sync")
+            SyncCheckpoint(self.SYNC_CHECKPOINT_DIR).clear()
+
+        if full or SyncCheckpoint(self.SYNC_CHECKPOINT_DIR).exists():
+            return self.fetch_and_save(None, None)
+
+        cached_data = self.load_cached_data()
+        last_update = self.get_last_update_time()
+        if cached_data is None or last_update is None:
+            logger.info("No cached data found. Falling back to a full sync")
+            return self.fetch_and_save(None, None)
+
+        return self.fetch_and_save(cached_data, last_update)
+
+    def fetch_and_save(self, cached_data: Optional[List[pd.DataFrame]], last_update: Optional[datetime]) -> Dict:
+        """
+        Fetch all data, or only what changed since last_update when a cached snapshot is given,
+        and write the resulting snapshot. Returns a summary with timings and row counts.
+        A full fetch is checkpointed per model, see SyncCheckpoint.
+        """
+        started = time.perf_counter()
+        current_time = datetime.now()
+        incremental = cached_data is not None and last_update is not None
+        checkpoint = None
+        on_model_done = None
+
+        history_start = None
+        if not incremental:
+            checkpoint = SyncCheckpoint(self.SYNC_CHECKPOINT_DIR)
+            current_time = checkpoint.start(current_time)
+            if self.history_days > 0:
+                history_start = (current_time - timedelta(days=self.history_days)).replace(hour=0, minute=0, second=0, microsecond=0)
+            # Without a complete snapshot, let the dashboard start with the models fetched so far
+            if self.get_last_update_time() is None:
+                on_model_done = self.save_partial_snapshot
+
+        summary = {
+            'mode': 'incremental' if incremental else 'full',
+            'success': False,
+            'fetched_rows': {},
+            'total_rows': {},
+        }
+
+        new_data = fetch_and_process_data(last_update - timedelta(hours=3) if incremental else None,
+                                          checkpoint=checkpoint, on_model_done=on_model_done, history_start=history_start)
+        summary['fetch_seconds'] = time.perf_counter() - started
+
+        if not new_data or any(df is None for df in new_data):
+            summary['total_seconds'] = time.perf_counter() - started
+            return summary
+
+        data = self.merge_new_data(cached_data, new_data) if incremental else list(new_data)
+        self.save_cached_data(data)
+        self.set_last_update_time(current_time)
+        self.data, self.last_update = data, current_time
+        if checkpoint is not None:
+            self.set_history_start(history_start)
+            checkpoint.clear()
+
+        summary['success'] = True
+        summary['fetched_rows'] = {name: len(df) for name, df in zip(FRAME_NAMES, new_data)}
+        summary['total_rows'] = {name: len(df) for name, df in zip(FRAME_NAMES, data)}
+        summary['total_seconds'] = time.perf_counter() - started
+        return summary
+
+    def save_partial_snapshot(self, model: str, data: List[pd.DataFrame]):
+        logger.info(f"{model} fetched, saving partial snapshot")
+        self.save_cached_data(list(data))
+
     def save_financials_data(self, new_financials_data={}):
 
         if new_financials_data:
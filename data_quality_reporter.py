@@ -1,8 +1,7 @@
 import pandas as pd
 from dash import html, dash_table
-import ast
 
-from data_management import DataManager
+from data_management import DataManager, parse_many2one
 from logging_config import setup_logging
 
 logger = setup_logging()
@@ -53,11 +52,12 @@ class DataQualityReporter:
         start_date = pd.to_datetime(start_date)
         end_date = pd.to_datetime(end_date)
 
-        # Filter timesheet data based on date range
-        filtered_timesheet = self.data_manager.df_timesheet[
-            (self.data_manager.df_timesheet['date'] >= start_date) &
-            (self.data_manager.df_timesheet['date'] <= end_date)
-        ].copy()
+        # Filter timesheet data based on date range, task names come with the enriched timesheet
+        timesheet = self.data_manager.get_enriched_timesheet()
+        filtered_timesheet = timesheet[
+            (timesheet['date'] >= start_date) &
+            (timesheet['date'] <= end_date)
+        ]
 
         # Filter timesheets longer than 8 hours
         long_timesheets = filtered_timesheet[filtered_timesheet['unit_amount'] > 8]
@@ -65,21 +65,14 @@ class DataQualityReporter:
         # Sort by hours descending
         long_timesheets = long_timesheets.sort_values('unit_amount', ascending=False)
 
-        # Merge with tasks to get task names
-        long_timesheets['task_id'] = long_timesheets['task_id'].astype(str)
-        self.data_manager.df_tasks['id'] = self.data_manager.df_tasks['id'].astype(str)
-        merged_data = pd.merge(long_timesheets, self.data_manager.df_tasks[['id', 'name']], left_on='task_id', right_on='id', how='left')
-
         # Prepare the data for the table
-        table_data = merged_data[['employee_name', 'project_name', 'task_id', 'name', 'date', 'unit_amount']].rename(columns={
-            'name': 'task_name',
+        table_data = long_timesheets[['employee_name', 'project_name', 'task_id', 'task_name', 'date', 'unit_amount']].rename(columns={
             'date': 'created_on',
             'unit_amount': 'duration'
         })
 
-        # Extract task name from task_id if necessary
-        table_data['task_name'] = table_data['task_name'].fillna(table_data['task_id'].apply(self._extract_task_name))
-        table_data['task_id'] = table_data['task_id'].apply(lambda x: ast.literal_eval(x)[0] if isinstance(x, str) and x.startswith('[') else x)
+        # task_id is an Odoo many2one: [id, name] or False, show the id
+        table_data['task_id'] = table_data['task_id'].apply(lambda x: (parse_many2one(x) or (x,))[0])
 
         # Round duration to 2 decimal places
         table_data['duration'] = table_data['duration'].round(2)
@@ -135,10 +128,3 @@ class DataQualityReporter:
             open_tasks = self.data_manager.df_tasks[self.data_manager.df_tasks['date_end'].isna()]['project_name']
             return set(closed_projects) & set(open_tasks)
         return set()
-
-    @staticmethod
-    def _extract_task_name(task_id):
-        try:
-            return ast.literal_eval(task_id)[1] if isinstance(task_id, str) and task_id.startswith('[') else task_id
-        except:
-            return task_id
@@ -0,0 +1,113 @@
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+# Used until the browser has reported its window width
+DEFAULT_VIEWPORT_WIDTH = 1200
+
+# Narrowest bar worth drawing, bar charts with more bars than fit switch to a coarser bucket
+MIN_BAR_WIDTH_PX = 4
+
+# (period, label, approximate days per bucket), finest first
+BAR_BUCKETS = [
+    ('D', 'Daily', 1),
+    ('W', 'Weekly', 7),
+    ('M', 'Monthly', 30.44),
+    ('Q', 'Quarterly', 91.31),
+    ('Y', 'Yearly', 365.25),
+]
+
+def max_points(viewport_width: Optional[int]) -> int:
+    """One point per pixel of the browser window is all a chart can show."""
+    return int(viewport_width or DEFAULT_VIEWPORT_WIDTH)
+
+def lttb_indices(x, y, threshold: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling. The first and last points
+    are kept, the others are split into threshold - 2 buckets and from each bucket the point forming the
+    largest triangle with the previously kept point and the average of the next bucket is kept, which
+    preserves peaks and dips. x must be sorted and numeric.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], starts) / counts
+    avg_y = np.add.reduceat(y[:n - 1], starts) / counts
+    # The third point of the triangle is the next bucket's average, or the last point for the last bucket
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    selected = 0
+    for i, (start, end) in enumerate(zip(starts, edges[1:])):
+        area = np.abs(
+            (x[selected] - next_x[i]) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (next_y[i] - y[selected])
+        )
+        selected = start + int(area.argmax())
+        indices[i + 1] = selected
+    return indices
+
+def downsample_line(data: pd.DataFrame, x_column: str, y_column: str, threshold: int) -> pd.DataFrame:
+    """
+    The rows of data to plot as a line of at most threshold points, sorted by x_column.
+    Rows with a missing value are dropped first.
+    """
+    data = data.dropna(subset=[x_column, y_column]).sort_values(x_column)
+    if len(data) <= threshold:
+        return data
+
+    x = data[x_column]
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    indices = lttb_indices(x, data[y_column].to_numpy(), threshold)
+    logger.debug(f"Downsampled {y_column} from {len(data)} to {len(indices)} points")
+    return data.iloc[indices]
+
+def bar_bucket(start, end, viewport_width: Optional[int]) -> Tuple[str, str]:
+    """
+    The finest (period, label) of BAR_BUCKETS that fits one bar per bucket between start and end
+    in the browser window.
+    """
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+    max_bars = max(max_points(viewport_width) // MIN_BAR_WIDTH_PX, 1)
+    for period, label, days_per_bucket in BAR_BUCKETS:
+        if days / days_per_bucket <= max_bars:
+            return period, label
+    return BAR_BUCKETS[-1][:2]
+
+def bucket_dates(dates: pd.Series, period: str) -> pd.Series:
+    """The start of the period each date falls in, dates are returned as they are for daily buckets."""
+    dates = pd.to_datetime(dates)
+    if period == 'D':
+        return dates
+    return dates.dt.to_period(period).dt.start_time
+
+def zoom_event(relayout_data) -> bool:
+    """Whether a Graph's relayoutData comes from zooming, panning or resetting the x axis."""
+    return bool(relayout_data) and any(key.startswith(('xaxis.range', 'xaxis.autorange')) for key in relayout_data)
+
+def zoomed_range(relayout_data) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """The x axis range zoomed into, None when the axis shows everything."""
+    if not relayout_data:
+        return None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return pd.Timestamp(relayout_data['xaxis.range[0]']), pd.Timestamp(relayout_data['xaxis.range[1]'])
+    if 'xaxis.range' in relayout_data:
+        start, end = relayout_data['xaxis.range']
+        return pd.Timestamp(start), pd.Timestamp(end)
+    return None
@@ -0,0 +1,56 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+_thread_pool = None
+_process_pool = None
+_process_pool_pid = None
+_lock = threading.Lock()
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """
+    Threads shared by all callbacks, for work that spends most of its time in pandas/numpy code releasing the GIL.
+    """
+    global _thread_pool
+    with _lock:
+        if _thread_pool is None:
+            workers = int(os.getenv('EXECUTOR_THREADS') or '8')
+            _thread_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='oodash')
+            logger.info(f"Started thread pool with {workers} workers")
+    return _thread_pool
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Processes shared by all callbacks, for heavy pure Python/pandas work. Functions and arguments
+    must be picklable, so pass plain data or file paths rather than the DataManager.
+    """
+    global _process_pool, _process_pool_pid
+    with _lock:
+        # A pool inherited through fork (e.g. by a background callback worker) belongs to the parent
+        if _process_pool is None or _process_pool_pid != os.getpid():
+            workers = process_pool_size()
+            _process_pool = ProcessPoolExecutor(max_workers=workers)
+            _process_pool_pid = os.getpid()
+            logger.info(f"Started process pool with {workers} workers")
+    return _process_pool
+
+def process_pool_size() -> int:
+    return int(os.getenv('EXECUTOR_PROCESSES') or '0') or os.cpu_count() or 1
+
+def run_concurrently(calls: List[Tuple[Callable, tuple]], use_processes: bool = False) -> List:
+    """
+    Run independent calls, given as (func, args) pairs, on the shared pool and return their results in order.
+    The first exception raised by a call is re-raised.
+    """
+    if len(calls) == 1:
+        func, args = calls[0]
+        return [func(*args)]
+
+    pool = get_process_pool() if use_processes else get_thread_pool()
+    futures = [pool.submit(func, *args) for func, args in calls]
+    return [future.result() for future in futures]
@@ -0,0 +1,122 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+class OdooFetchError(Exception):
+    """Raised when a batch still fails after all retries."""
+
+class AdaptiveBatchController:
+    """
+    Adjusts the batch size and the number of in-flight requests from observed latency and errors.
+    Fast batches grow both, batches slower than target_latency shrink them, failures halve them.
+    """
+    def __init__(self, batch_size=2000, min_batch_size=100, max_batch_size=20000, max_concurrency=4,
+                 target_latency=5.0, max_retries=4, backoff_base=1.0):
+        self.batch_size = batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.concurrency = 1
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._lock = threading.Lock()
+
+    def record_success(self, rows, seconds):
+        with self._lock:
+            if seconds < self.target_latency / 2 and rows >= self.batch_size:
+                self.batch_size = min(self.max_batch_size, int(self.batch_size * 1.5))
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            elif seconds > self.target_latency:
+                self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+                self.concurrency = max(1, self.concurrency - 1)
+
+    def record_failure(self):
+        with self._lock:
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+            self.concurrency = max(1, self.concurrency // 2)
+
+    def backoff(self, attempt):
+        """Exponential backoff with jitter, in seconds."""
+        return self.backoff_base * (2 ** attempt) * (0.5 + random.random())
+
+def call_with_retry(func, controller, description, *args):
+    for attempt in range(controller.max_retries + 1):
+        try:
+            return func(*args)
+        except Exception as err:
+            if attempt >= controller.max_retries:
+                raise OdooFetchError(f"{description} failed after {attempt + 1} attempts: {err}") from err
+            delay = controller.backoff(attempt)
+            logger.warning(f"{description} failed ({err}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def read_with_retry(read_batch, ids, controller, attempt=0):
+    """
+    Read one batch of ids. A failed batch is retried after a backoff, split by the
+    (now smaller) batch size so a request that timed out on the Odoo side gets lighter.
+    """
+    started = time.perf_counter()
+    try:
+        rows = read_batch(ids)
+    except Exception as err:
+        controller.record_failure()
+        if attempt >= controller.max_retries:
+            raise OdooFetchError(f"Reading {len(ids)} records failed after {attempt + 1} attempts: {err}") from err
+        # Other threads keep changing the batch size, split by one value so no id is skipped or read twice
+        size = controller.batch_size
+        delay = controller.backoff(attempt)
+        logger.warning(f"Reading {len(ids)} records failed ({err}), retrying in {delay:.1f}s with batches of {size}")
+        time.sleep(delay)
+
+        rows = []
+        for start in range(0, len(ids), size):
+            rows.extend(read_with_retry(read_batch, ids[start:start + size], controller, attempt + 1))
+        return rows
+
+    controller.record_success(len(ids), time.perf_counter() - started)
+    return rows
+
+def fetch_in_batches(read_batch, ids, controller, on_batch=None):
+    """
+    Read all ids in batches, keeping up to controller.concurrency requests in flight.
+    Returns the rows in the order of ids. on_batch(batch_ids, rows) is called in id order
+    as soon as all earlier batches have completed, e.g. to checkpoint progress.
+    """
+    results = {}
+    batches = {}
+    pending = {}
+    position = 0
+    flushed = 0
+
+    with ThreadPoolExecutor(max_workers=controller.max_concurrency) as executor:
+        while position < len(ids) or pending:
+            while position < len(ids) and len(pending) < controller.concurrency:
+                batch = ids[position:position + controller.batch_size]
+                pending[executor.submit(read_with_retry, read_batch, batch, controller)] = position
+                batches[position] = batch
+                position += len(batch)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                start = pending.pop(future)
+                try:
+                    results[start] = future.result()
+                except Exception:
+                    for other in pending:
+                        other.cancel()
+                    raise
+
+            while on_batch is not None and flushed in results:
+                on_batch(batches[flushed], results[flushed])
+                flushed += len(batches[flushed])
+
+            logger.debug(f"Fetched {sum(len(rows) for rows in results.values())}/{len(ids)} records, "
+                         f"batch size {controller.batch_size}, concurrency {controller.concurrency}")
+
+    return [row for start in sorted(results) for row in results[start]]
@@ -0,0 +1,70 @@
+import functools
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Optional
+
+import diskcache
+import plotly.graph_objs as go
+
+from data_management import DataManager
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+_cache = None
+
+def get_figure_cache() -> Optional[diskcache.Cache]:
+    """
+    Disk-backed cache of rendered figures, shared by all worker processes of the dashboard.
+    Least recently used entries are evicted once FIGURE_CACHE_SIZE_MB is reached, 0 disables it.
+    """
+    global _cache
+    size_limit_mb = int(os.getenv('FIGURE_CACHE_SIZE_MB') or '512')
+    if size_limit_mb <= 0:
+        return None
+
+    if _cache is None:
+        _cache = diskcache.Cache(
+            os.getenv('FIGURE_CACHE_DIR') or 'data/figure_cache',
+            size_limit=size_limit_mb * 1024 * 1024,
+            eviction_policy='least-recently-used'
+        )
+    return _cache
+
+def serialise_result(result):
+    # Figures are stored as plain dicts, Dash sends them to the browser as is
+    if isinstance(result, go.Figure):
+        return result.to_plotly_json()
+    if isinstance(result, (tuple, list)):
+        return type(result)(serialise_result(item) for item in result)
+    return result
+
+def memoize_figures(data_manager: DataManager, name: str, depends_on: Optional[Callable] = None):
+    """
+    Memoize a function returning figures by (data version, arguments). depends_on returns any other
+    state the result depends on, e.g. the job costs edited in Settings, which is added to the key.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_figure_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+
+            key_parts = [name, data_manager.data_version, args, kwargs, depends_on() if depends_on else None]
+            key = hashlib.sha256(json.dumps(key_parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+            started = time.perf_counter()
+            result = cache.get(key)
+            if result is not None:
+                logger.debug(f"{name}: cache hit in {(time.perf_counter() - started) * 1000:.1f}ms")
+                return result
+
+            result = serialise_result(func(*args, **kwargs))
+            cache.set(key, result)
+            logger.debug(f"{name}: computed in {time.perf_counter() - started:.2f}s")
+            return result
+        return wrapper
+    return decorator
@@ -1,18 +1,79 @@
-import ast
+import os
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import as_completed
+from typing import Dict
+
+import numpy as np
 import pandas as pd
-import plotly.graph_objs as go
-from datetime import datetime
 
+from chart_builder import bar, bucket_top_n, figure, series_order
 from data_management import DataManager
+from downsampling import bar_bucket, bucket_dates
+from executors import get_process_pool, process_pool_size
 from logging_config import setup_logging
 
 logger = setup_logging()
 
+SHARD_COLUMNS = ('project', 'date', 'hours', 'revenue', 'employee', 'task')
+
+def calculate_shard(directory: str, start: int, end: int, date_column: str) -> Dict[str, Dict]:
+    """
+    Aggregate rows start:end of the memory-mapped timesheet columns in directory, which are sorted by
+    project and date. Runs in a worker process; returns the financials per project name, daily data included.
+    """
+    columns = {
+        name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')[start:end]
+        for name in SHARD_COLUMNS
+    }
+    with open(os.path.join(directory, 'labels.pkl'), 'rb') as f:
+        labels = pickle.load(f)
+    project, date = columns['project'], columns['date']
+
+    # Rows are sorted, so every day of a project is a contiguous run of rows and every project a run of days
+    new_day = np.concatenate(([True], (np.diff(project) != 0) | (np.diff(date) != 0)))
+    day_starts = np.flatnonzero(new_day)
+    day_of_row = np.cumsum(new_day) - 1
+    day_projects = project[day_starts]
+    day_hours = np.add.reduceat(columns['hours'], day_starts)
+    day_revenue = np.add.reduceat(columns['revenue'], day_starts)
+
+    def unique_per_day(codes):
+        # First occurrence of every code within its day, in row order like Series.unique
+        first = ~pd.DataFrame({'day': day_of_row, 'code': codes}).duplicated().to_numpy()
+        return np.split(codes[first], np.flatnonzero(np.diff(day_of_row[first])) + 1)
+
+    day_employees = unique_per_day(columns['employee'])
+    day_tasks = unique_per_day(columns['task'])
+
+    project_starts = np.concatenate((np.flatnonzero(np.concatenate(([True], np.diff(day_projects) != 0))), [len(day_starts)]))
+
+    results = {}
+    for project_start, project_end in zip(project_starts[:-1], project_starts[1:]):
+        days = slice(project_start, project_end)
+        daily_data = pd.DataFrame({
+            date_column: pd.to_datetime(date[day_starts[days]]),
+            'unit_amount': day_hours[days],
+            'employee_name': [labels['employee'][codes].tolist() for codes in day_employees[days]],
+            'task_id': [labels['task'][codes].tolist() for codes in day_tasks[days]]
+        })
+        results[labels['project'][day_projects[project_start]]] = {
+            'total_revenue': float(day_revenue[days].sum()),
+            'total_hours': float(day_hours[days].sum()),
+            'daily_data': daily_data.to_dict('records')
+        }
+    return results
+
 class FinancialCalculator:
     def __init__(self, data_manager: DataManager):
         self.data_manager = data_manager
 
-    def calculate_all_financials(self, start_date, end_date):
+    def calculate_all_financials(self, start_date, end_date, progress_callback=None):
+        """
+        Calculate revenue, hours and daily data for every project in the portfolio.
+        progress_callback(position, total, project_name) is called as each project is started.
+        """
         logger.info("Calculating all financials")
         
         financials_data = {}
@@ -22,27 +83,27 @@ class FinancialCalculator:
             logger.error("No date column found in timesheet data")
             return financials_data
         
-        try:
-            self.data_manager.df_timesheet[date_column] = pd.to_datetime(self.data_manager.df_timesheet[date_column], errors='coerce')
-            self.data_manager.df_timesheet = self.data_manager.df_timesheet.dropna(subset=[date_column])
-        except Exception as e:
-            logger.error(f"Error converting date column to datetime: {str(e)}")
-            return financials_data
+        workers = process_pool_size()
+        if workers > 1 and len(self.data_manager.df_timesheet) >= int(os.getenv('FINANCIALS_SHARD_MIN_ROWS') or '100000'):
+            return self.calculate_financials_sharded(date_column, start_date, end_date, workers, progress_callback)
         
-        for _, project in self.data_manager.df_portfolio.iterrows():
+        total_projects = len(self.data_manager.df_portfolio)
+        for position, (_, project) in enumerate(self.data_manager.df_portfolio.iterrows(), start=1):
             project_name = project['name']
             logger.info(f"Calculating financials for project: {project_name}")
-            project_timesheet = self.data_manager.df_timesheet[
-                (self.data_manager.df_timesheet['project_name'] == project_name) &
-                (self.data_manager.df_timesheet[date_column] >= start_date) &
-                (self.data_manager.df_timesheet[date_column] <= end_date)
+            if progress_callback:
+                progress_callback(position, total_projects, project_name)
+            project_timesheet = self.data_manager.get_project_timesheet(project_name)
+            project_timesheet = project_timesheet[
+                (project_timesheet[date_column] >= start_date) &
+                (project_timesheet[date_column] <= end_date)
             ].copy()
             
             if project_timesheet.empty:
                 logger.warning(f"No timesheet data for project: {project_name}")
                 continue
             
-            project_revenue = self.calculate_project_revenue(project_timesheet, self.data_manager.df_employees, self.data_manager.job_costs)
+            project_revenue = project_timesheet['revenue'].sum()
             project_hours = project_timesheet['unit_amount'].sum()
             
             project_timesheet['task_id_str'] = project_timesheet['task_id'].astype(str)
@@ -66,32 +127,80 @@ class FinancialCalculator:
         logger.info(f"Financials calculated for {len(financials_data)} projects")
         return financials_data
 
-    def calculate_project_revenue(self, timesheet_data, employees_data, job_costs):
-        revenue = 0
-        for _, row in timesheet_data.iterrows():
-            employee_data = employees_data[employees_data['name'] == row['employee_name']]
-            if employee_data.empty:
-                logger.warning(f"Employee {row} not found in employees data")
+    def calculate_financials_sharded(self, date_column, start_date, end_date, workers, progress_callback=None):
+        """
+        Same result as the per-project loop, with the projects sharded across the shared process pool.
+        The columns the workers need are written once as memory-mapped .npy files sorted by project,
+        so a worker is only handed the directory and its row range instead of a pickled copy.
+        String columns are factorized to integer codes, which the workers map back to the labels
+        when they build the daily data.
+        """
+        portfolio_projects = self.data_manager.df_portfolio['name'].drop_duplicates()
+        timesheet = self.data_manager.get_enriched_timesheet()
+        timesheet = timesheet[
+            timesheet['project_name'].isin(portfolio_projects) &
+            (timesheet[date_column] >= start_date) &
+            (timesheet[date_column] <= end_date)
+        ]
+
+        project_codes, project_labels = pd.factorize(timesheet['project_name'])
+        # Employees missing from the employees data have no name, keep them as NaN like the per-project loop
+        employee_codes, employee_labels = pd.factorize(timesheet['employee_name'], use_na_sentinel=False)
+        task_codes, task_labels = pd.factorize(timesheet['task_id'].astype(str))
+
+        dates = timesheet[date_column].to_numpy(dtype='datetime64[ns]').view('int64')
+        order = np.lexsort((dates, project_codes))
+        columns = {
+            'project': project_codes[order],
+            'date': dates[order],
+            'hours': timesheet['unit_amount'].to_numpy(dtype='float64')[order],
+            'revenue': timesheet['revenue'].to_numpy(dtype='float64')[order],
+            'employee': employee_codes[order],
+            'task': task_codes[order]
+        }
+
+        # Cut the rows into a few shards per worker, at project boundaries so a project is never split
+        project_starts = np.flatnonzero(np.diff(columns['project'])) + 1
+        shard_count = workers * 4
+        cuts = [project_starts[i] for i in np.searchsorted(project_starts, np.arange(1, shard_count) * len(order) / shard_count) if i < len(project_starts)]
+        bounds = sorted(set([0, *map(int, cuts), len(order)]))
+        logger.info(f"Calculating financials for {len(project_labels)} projects in {len(bounds) - 1} shards on {workers} workers")
+
+        directory = tempfile.mkdtemp(prefix='financials-', dir=os.path.dirname(self.data_manager.DATA_FILE) or None)
+        try:
+            for name, values in columns.items():
+                np.save(os.path.join(directory, f'{name}.npy'), values)
+            with open(os.path.join(directory, 'labels.pkl'), 'wb') as f:
+                pickle.dump({
+                    'project': np.asarray(project_labels, dtype=object),
+                    'employee': np.asarray(employee_labels, dtype=object),
+                    'task': np.asarray(task_labels, dtype=object)
+                }, f)
+
+            pool = get_process_pool()
+            futures = [pool.submit(calculate_shard, directory, start, end, date_column) for start, end in zip(bounds, bounds[1:]) if end > start]
+            results = {}
+            for future in as_completed(futures):
+                shard_results = future.result()
+                results.update(shard_results)
+                if progress_callback and shard_results:
+                    progress_callback(len(results), len(project_labels), next(reversed(shard_results)))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        # In portfolio order, like the per-project loop
+        financials_data = {}
+        for project_name in portfolio_projects:
+            if project_name not in results:
+                logger.warning(f"No timesheet data for project: {project_name}")
                 continue
-            
-            employee = employee_data.iloc[0]
-            job_title = self.extract_job_title(employee)
-            
-            job_cost_data = job_costs.get(job_title, {})
-            
-            try:
-                daily_revenue = float(job_cost_data.get('revenue') or 0)
-            except (ValueError, AttributeError):
-                logger.warning(f"Invalid revenue data for job title: {job_title}")
-                daily_revenue = 0
-            
-            entry_revenue = (row['unit_amount'] / 8) * daily_revenue
-            revenue += entry_revenue
-        return revenue
+            financials_data[project_name] = results[project_name]
+
+        logger.info(f"Financials calculated for {len(financials_data)} projects")
+        return financials_data
 
     def create_financials_chart(self, financials_data):
         logger.info("Creating financials chart")
-        fig = go.Figure()
         
         all_daily_data = []
         
@@ -103,17 +212,8 @@ class FinancialCalculator:
             
             if 'revenue' not in daily_data.columns:
                 logger.debug(f"Calculating daily revenue for project: {project}")
-                daily_data['revenue'] = daily_data.apply(
-                    lambda row: self.calculate_project_revenue(
-                        self.data_manager.df_timesheet[
-                            (self.data_manager.df_timesheet['project_name'] == project) &
-                            (self.data_manager.df_timesheet['date'] == row['date'])
-                        ],
-                        self.data_manager.df_employees,
-                        self.data_manager.job_costs
-                    ),
-                    axis=1
-                )
+                revenue_per_day = self.data_manager.get_project_timesheet(project).groupby('date')['revenue'].sum()
+                daily_data['revenue'] = pd.to_datetime(daily_data['date']).map(revenue_per_day).fillna(0)
             
             logger.debug(f"Daily revenue for {project}: {daily_data['revenue'].sum()}")
             
@@ -122,48 +222,50 @@ class FinancialCalculator:
         
         if not all_daily_data:
             logger.warning("No daily data available for any project")
-            return fig
+            return figure([])
         
-        all_daily_data = pd.concat(all_daily_data)
+        all_daily_data = bucket_top_n(pd.concat(all_daily_data), 'project', 'revenue')
         logger.info(f"Total daily data rows: {len(all_daily_data)}")
         
-        pivoted_data = all_daily_data.pivot(index='date', columns='project', values='revenue').fillna(0)
+        pivoted_data = all_daily_data.pivot_table(index='date', columns='project', values='revenue', aggfunc='sum').fillna(0)
+        pivoted_data = pivoted_data[series_order(pivoted_data.columns)]
         logger.info(f"Pivoted data shape: {pivoted_data.shape}")
 
+        traces = []
         for project in pivoted_data.columns:
             project_revenue = pivoted_data[project].sum()
             logger.info(f"Total revenue for {project}: {project_revenue}")
-            fig.add_trace(go.Bar(
+            traces.append(bar(
                 x=pivoted_data.index,
                 y=pivoted_data[project],
                 name=project,
                 hoverinfo='none',
-                hovertemplate=None
+                hovertemplate='<b>%{fullData.name}</b>Revenue: $%{y:,.2f}<extra></extra>'
             ))
         
-        fig.update_layout(
-            title='Daily Revenue by Project',
-            xaxis_title='Date',
-            yaxis_title='Revenue',
+        return figure(
+            traces,
+            title={'text': 'Daily Revenue by Project'},
+            xaxis={'title': {'text': 'Date'}},
+            yaxis={'title': {'text': 'Revenue'}},
             barmode='stack',
             hovermode='closest',
             hoverlabel=dict(
                 bgcolor="white",
-                font_size=12,
-                font_family="Rockwell"
+                font=dict(size=12, family="Rockwell")
             )
         )
 
-        fig.update_traces(
-            hovertemplate='<b>%{fullData.name}</b>Revenue: $%{y:,.2f}<extra></extra>'
-        )
-        
-        return fig
-
-    def create_hours_chart(self, financials_data):
+    def create_hours_chart(self, financials_data, viewport_width=None, x_range=None):
+        """
+        Hours per project, per day or per week/month/... when there are more days than fit the browser window.
+        x_range is the zoomed in (start, end), which is shown at the finest bucket that fits.
+        """
         logger.info("Creating hours chart")
-        fig = go.Figure()
+        traces = []
+        bucket_label = 'Daily'
         
+        all_daily_data = []
         for project, data in financials_data.items():
             daily_data = pd.DataFrame(data['daily_data'])
             if daily_data.empty:
@@ -171,26 +273,43 @@ class FinancialCalculator:
                 continue
             
             date_column = daily_data.columns[0]
-            
-            fig.add_trace(go.Bar(
-                x=daily_data[date_column],
-                y=daily_data['unit_amount'],
-                name=project
-            ))
+            all_daily_data.append(pd.DataFrame({'date': pd.to_datetime(daily_data[date_column]), 'unit_amount': daily_data['unit_amount'], 'project': project}))
+
+        all_daily_data = pd.concat(all_daily_data) if all_daily_data else pd.DataFrame(columns=['date', 'unit_amount', 'project'])
+        if x_range:
+            all_daily_data = all_daily_data[all_daily_data['date'].between(*x_range)]
+
+        if not all_daily_data.empty:
+            start, end = x_range or (all_daily_data['date'].min(), all_daily_data['date'].max())
+            period, bucket_label = bar_bucket(start, end, viewport_width)
+            all_daily_data = all_daily_data.assign(date=bucket_dates(all_daily_data['date'], period))
+
+            all_daily_data = bucket_top_n(all_daily_data, 'project', 'unit_amount')
+            all_daily_data = all_daily_data.groupby(['project', 'date'], sort=False)['unit_amount'].sum().reset_index()
+
+            for project in series_order(all_daily_data['project']):
+                project_data = all_daily_data[all_daily_data['project'] == project]
+                traces.append(bar(
+                    x=project_data['date'],
+                    y=project_data['unit_amount'],
+                    name=project
+                ))
         
-        fig.update_layout(
-            title='Daily Hours by Project',
-            xaxis_title='Date',
-            yaxis_title='Hours',
+        xaxis = {'title': {'text': 'Date'}}
+        if x_range:
+            xaxis['range'] = [str(x_range[0]), str(x_range[1])]
+
+        logger.info(f"Hours chart created with {bucket_label.lower()} buckets")
+        return figure(
+            traces,
+            title={'text': f'{bucket_label} Hours by Project'},
+            xaxis=xaxis,
+            yaxis={'title': {'text': 'Hours'}},
             barmode='stack'
         )
-        
-        logger.info("Hours chart created")
-        return fig
 
     def create_revenue_chart(self, financials_data):
         logger.info("Creating revenue chart")
-        fig = go.Figure()
         
         projects = list(financials_data.keys())
         revenues = [data['total_revenue'] for data in financials_data.values()]
@@ -198,35 +317,16 @@ class FinancialCalculator:
         logger.info(f"Projects: {projects}")
         logger.info(f"Revenues: {revenues}")
         
-        fig.add_trace(go.Bar(
-            x=projects,
-            y=revenues,
-            text=revenues,
-            textposition='auto'
-        ))
-        
-        fig.update_layout(
-            title='Total Revenue by Project',
-            xaxis_title='Project',
-            yaxis_title='Revenue',
-            yaxis_tickformat='$,.0f',
+        logger.info("Revenue chart created")
+        return figure(
+            [bar(
+                x=projects,
+                y=revenues,
+                text=revenues,
+                textposition='auto'
+            )],
+            title={'text': 'Total Revenue by Project'},
+            xaxis={'title': {'text': 'Project'}},
+            yaxis={'title': {'text': 'Revenue'}, 'tickformat': '$,.0f'},
             barmode='stack'
         )
-        
-        logger.info("Revenue chart created")
-        return fig
-
-    @staticmethod
-    def extract_job_title(employee):
-        if 'job_id' in employee and isinstance(employee['job_id'], str):
-            try:
-                job_id_list = ast.literal_eval(employee['job_id'])
-                return job_id_list[1] if len(job_id_list) > 1 else 'Unknown'
-            except (ValueError, SyntaxError, IndexError) as e:
-                logger.error(f"Job title not found: {e}")
-                return 'Unknown'
-        elif 'job_title' in employee:
-            return employee['job_title']
-        else:
-            logger.warning(f"Job title not found: {employee}")
-            return 'Unknown'
@@ -1,12 +1,13 @@
-from langchain_community.chat_models import ChatOllama
-from langchain.prompts import ChatPromptTemplate
-from ollama import Client
 from logging_config import setup_logging
 
 logger = setup_logging()
 
+# The LLM stack is heavy to import, so it is only loaded when a report is actually requested
+
 def check_ollama_status():
     try:
+        from ollama import Client
+
         client = Client()
         models = client.list()
         return True, models
@@ -85,6 +86,9 @@ def prepare_data_summary(df_projects, df_employees, df_sales, df_financials, df_
     return summary
 
 def generate_llm_report(df_projects, df_employees, df_sales, df_financials, df_timesheet, df_tasks, selected_model):
+    from langchain_community.chat_models import ChatOllama
+    from langchain.prompts import ChatPromptTemplate
+
     data_summary = prepare_data_summary(df_projects, df_employees, df_sales, df_financials, df_timesheet, df_tasks)
 
     ollama_running, available_models = check_ollama_status()
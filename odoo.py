@@ -1,12 +1,16 @@
 import os
+import threading
 import xmlrpc.client
 import pandas as pd
 from dotenv import load_dotenv, find_dotenv
+from fetch_controller import AdaptiveBatchController, OdooFetchError, call_with_retry, fetch_in_batches
 from logging_config import setup_logging
+from odoo_transport import JsonRpcPool, ServerProxyPool
 
 logger = setup_logging()
 
-load_dotenv(find_dotenv(filename='cfg/.env', raise_error_if_not_found=True))
+# oodash.py and sync.py require cfg/.env, without it (e.g. in the tests) the settings below keep their defaults
+load_dotenv(find_dotenv(filename='cfg/.env'))
 
 # Odoo API connection
 url = os.getenv('ODOO_URL')
@@ -14,21 +18,152 @@ db = os.getenv('ODOO_DB')
 username = os.getenv('ODOO_USERNAME')
 api_key = os.getenv('ODOO_API_KEY')
 
-# Create XML-RPC client with allow_none=True
-common = xmlrpc.client.ServerProxy(f'{url}/xmlrpc/2/common', allow_none=True)
-uid = common.authenticate(db, username, api_key, {})
-models = xmlrpc.client.ServerProxy(f'{url}/xmlrpc/2/object', allow_none=True)
+# Connection settings, transport is either 'xmlrpc' or 'jsonrpc'
+transport = (os.getenv('ODOO_TRANSPORT') or 'xmlrpc').lower()
+pool_size = int(os.getenv('ODOO_POOL_SIZE') or '4')
+use_gzip = (os.getenv('ODOO_GZIP') or 'false').lower() == 'true'
+timeout = float(os.getenv('ODOO_TIMEOUT') or '300')
+
+# Adaptive batching of reads
+batch_size = int(os.getenv('ODOO_BATCH_SIZE') or '2000')
+min_batch_size = int(os.getenv('ODOO_MIN_BATCH_SIZE') or '100')
+max_batch_size = int(os.getenv('ODOO_MAX_BATCH_SIZE') or '20000')
+max_concurrency = int(os.getenv('ODOO_MAX_CONCURRENCY') or str(pool_size))
+target_latency = float(os.getenv('ODOO_TARGET_LATENCY') or '5')
+max_retries = int(os.getenv('ODOO_MAX_RETRIES') or '4')
+
+class OdooSession:
+    """
+    Odoo session that authenticates on first use and again when Odoo rejects the cached uid.
+    Calls go through pools of keep-alive connections, so it can be shared between threads.
+    """
+    AUTH_ERRORS = ('AccessDenied', 'Access Denied', 'Session expired', 'SessionExpired')
+
+    def __init__(self, url, db, username, api_key, transport='xmlrpc'):
+        self.url = url
+        self.db = db
+        self.username = username
+        self.api_key = api_key
+        self._uid = None
+        self._lock = threading.Lock()
+        if transport == 'jsonrpc':
+            self.common = JsonRpcPool(f'{url}/jsonrpc', 'common', size=1, use_gzip=use_gzip, timeout=timeout)
+            self.models = JsonRpcPool(f'{url}/jsonrpc', 'object', size=pool_size, use_gzip=use_gzip, timeout=timeout)
+        elif transport == 'xmlrpc':
+            self.common = ServerProxyPool(f'{url}/xmlrpc/2/common', size=1, use_gzip=use_gzip, timeout=timeout)
+            self.models = ServerProxyPool(f'{url}/xmlrpc/2/object', size=pool_size, use_gzip=use_gzip, timeout=timeout)
+        else:
+            raise ValueError(f"Unknown Odoo transport: {transport}")
+
+    @property
+    def uid(self):
+        if self._uid is None:
+            with self._lock:
+                if self._uid is None:
+                    self._uid = self.authenticate()
+        return self._uid
+
+    def authenticate(self):
+        logger.info(f"Authenticating to Odoo at {self.url} as {self.username}")
+        with self.common.borrow() as common:
+            uid = common.authenticate(self.db, self.username, self.api_key, {})
+        if not uid:
+            raise PermissionError(f"Odoo authentication failed for user {self.username}")
+        return uid
+
+    def invalidate(self):
+        self._uid = None
+
+    def execute_kw(self, model, method, args, kwargs=None):
+        try:
+            return self._execute_kw(model, method, args, kwargs)
+        except xmlrpc.client.Fault as fault:
+            if not any(error in fault.faultString for error in self.AUTH_ERRORS):
+                raise
+            logger.warning(f"Odoo rejected the session, re-authenticating: {fault.faultString[:200]}")
+            self.invalidate()
+            return self._execute_kw(model, method, args, kwargs)
+
+    def _execute_kw(self, model, method, args, kwargs=None):
+        uid = self.uid
+        with self.models.borrow() as models:
+            return models.execute_kw(self.db, uid, self.api_key, model, method, args, kwargs or {})
+
+_session = None
+
+def get_session() -> OdooSession:
+    """
+    Return the shared Odoo session. Nothing is sent over the network until the first call.
+    """
+    global _session
+    if _session is None:
+        _session = OdooSession(url, db, username, api_key, transport=transport)
+    return _session
+
+_controllers = {}
+
+def get_controller(model) -> AdaptiveBatchController:
+    """
+    One controller per model, so what was learned about a model's batch size carries over to the next sync.
+    """
+    if model not in _controllers:
+        _controllers[model] = AdaptiveBatchController(
+            batch_size=batch_size,
+            min_batch_size=min_batch_size,
+            max_batch_size=max_batch_size,
+            max_concurrency=min(max_concurrency, pool_size),
+            target_latency=target_latency,
+            max_retries=max_retries
+        )
+    return _controllers[model]
+
+def fetch_odoo_data(model, fields, domain=[], limit=None, checkpoint=None, date_field=None, start_date=None, end_date=None):
+    """
+    Fetch all records of model matching domain. Ids are searched first, then read in
+    adaptively sized batches. Raises OdooFetchError when a batch keeps failing.
+    With a SyncCheckpoint every batch is persisted, and a model fetched before an
+    interruption resumes after the last persisted id.
+    With date_field, only records with start_date <= date_field < end_date are fetched.
+    """
+    logger.info(f"Fetching: {model}")
+    session = get_session()
+    controller = get_controller(model)
+    on_batch = None
+
+    if date_field and start_date is not None:
+        domain = domain + [(date_field, '>=', start_date.strftime('%Y-%m-%d'))]
+    if date_field and end_date is not None:
+        domain = domain + [(date_field, '<', end_date.strftime('%Y-%m-%d'))]
+
+    if checkpoint is not None:
+        if checkpoint.is_done(model):
+            logger.info(f"Fetched: {model} (from checkpoint)")
+            return checkpoint.load_records(model)
+
+        last_id = checkpoint.last_id(model)
+        if last_id:
+            logger.info(f"Resuming {model} after id {last_id}")
+            domain = domain + [('id', '>', last_id)]
+
+        def _on_batch(batch_ids, rows):
+            checkpoint.save_batch(model, [{k: v for k, v in record.items() if v is not None} for record in rows], batch_ids[-1])
+        on_batch = _on_batch
 
-def fetch_odoo_data(model, fields, domain=[], limit=None):
     try:
-        logger.info(f"Fetching: {model}")
-        result = models.execute_kw(db, uid, api_key, model, 'search_read', [domain, fields], {'limit': limit})
-        cleaned_result = [{k: v for k, v in record.items() if v is not None} for record in result]
-        logger.info(f"Fetched: {model}")
-        return cleaned_result
-    except Exception as err:
+        ids = call_with_retry(session.execute_kw, controller, f"Searching {model}", model, 'search', [domain], {'limit': limit, 'order': 'id'})
+        result = fetch_in_batches(lambda batch_ids: session.execute_kw(model, 'read', [batch_ids, fields]), ids, controller, on_batch=on_batch)
+    except OdooFetchError as err:
         logger.error(f"Error fetching data from Odoo, model {model}, fields {fields}, domain {domain}, limit {limit}: {err}")
-        return []
+        raise
+
+    if checkpoint is not None:
+        checkpoint.mark_done(model)
+        cleaned_result = checkpoint.load_records(model)
+    else:
+        cleaned_result = [{k: v for k, v in record.items() if v is not None} for record in result]
+
+    logger.info(f"Fetched: {model} ({len(cleaned_result)} records, batch size {controller.batch_size}, concurrency {controller.concurrency})")
+    return cleaned_result
 
 def validate_dataframe(df, required_columns):
     for col in required_columns:
@@ -41,7 +176,29 @@ def extract_id(x):
         return x[0]
     return x
 
-def fetch_and_process_data(last_update=None):
+# Models fetched for the dashboard, in the order they are fetched
+MODELS = [
+    ('project.project', ['id', 'name', 'partner_id', 'user_id', 'date_start', 'date', 'active']),
+    ('hr.employee', ['id', 'name', 'department_id', 'job_id', 'job_title']),
+    ('sale.order', ['name', 'partner_id', 'amount_total', 'date_order']),
+    ('account.analytic.line', ['employee_id', 'task_id', 'project_id', 'unit_amount', 'date']),
+    ('project.task', ['id', 'project_id', 'stage_id', 'name', 'create_date', 'date_end']),
+]
+
+# Date of the records of the models whose history is loaded on demand
+DATE_FIELDS = {
+    'sale.order': 'date_order',
+    'account.analytic.line': 'date',
+    'project.task': 'create_date',
+}
+
+def fetch_and_process_data(last_update=None, checkpoint=None, on_model_done=None, history_start=None):
+    """
+    Fetch all models and process them into dataframes.
+    on_model_done(model, dataframes) is called after each model but the last with the data fetched so far,
+    models not fetched yet are empty.
+    With history_start, the models in DATE_FIELDS are only fetched from that date on.
+    """
     try:
         # Prepare the domain for fetching only new or updated data
         if last_update:
@@ -50,63 +207,111 @@ def fetch_and_process_data(last_update=None):
             base_domain = []
 
         # Fetch necessary data
-        portfolio = fetch_odoo_data('project.project', ['id', 'name', 'partner_id', 'user_id', 'date_start', 'date', 'active'], domain=base_domain)
-        employees = fetch_odoo_data('hr.employee', ['id', 'name', 'department_id', 'job_id', 'job_title'], domain=base_domain)
-        sales = fetch_odoo_data('sale.order', ['name', 'partner_id', 'amount_total', 'date_order'], domain=base_domain)
-        timesheet_entries = fetch_odoo_data('account.analytic.line', ['employee_id', 'task_id', 'project_id', 'unit_amount', 'date'], domain=base_domain)
-        tasks = fetch_odoo_data('project.task', ['id', 'project_id', 'stage_id', 'name', 'create_date', 'date_end'], domain=base_domain)
-
-        # Convert to pandas DataFrames with data validation
-        df_portfolio = validate_dataframe(pd.DataFrame(portfolio), ['id', 'name', 'partner_id', 'user_id', 'date_start', 'date', 'active'])
-        df_employees = validate_dataframe(pd.DataFrame(employees), ['id', 'name', 'department_id', 'job_id', 'job_title'])
-        df_sales = validate_dataframe(pd.DataFrame(sales), ['name', 'partner_id', 'amount_total', 'date_order'])
-        df_timesheet = validate_dataframe(pd.DataFrame(timesheet_entries), ['employee_id', 'project_id', 'unit_amount', 'date'])
-        df_tasks = validate_dataframe(pd.DataFrame(tasks), ['project_id', 'stage_id', 'create_date', 'date_end'])
-
-        # Print column names for debugging
-        logger.info("df_portfolio columns: %s", df_portfolio.columns)
-        logger.info("df_employees columns: %s", df_employees.columns)
-        logger.info("df_sales columns: %s", df_sales.columns)
-        logger.info("df_timesheet columns: %s", df_timesheet.columns)
-        logger.info("df_tasks columns: %s", df_tasks.columns)
-
-        # Convert date columns to datetime
-        date_columns = {
-            'df_portfolio': ['date_start', 'date'],
-            'df_sales': ['date_order'],
-            # 'df_financials': ['date'],
-            'df_timesheet': ['date'],
-            'df_tasks': ['create_date', 'date_end']
-        }
+        fetched = {}
+        for model, fields in MODELS:
+            fetched[model] = fetch_odoo_data(model, fields, domain=base_domain, checkpoint=checkpoint,
+                                             date_field=DATE_FIELDS.get(model), start_date=history_start)
+            if on_model_done and len(fetched) < len(MODELS):
+                on_model_done(model, process_data(*(fetched.get(name, []) for name, _ in MODELS)))
 
-        for df_name, columns in date_columns.items():
-            df = locals()[df_name]
-            for col in columns:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-
-        # Apply extract_id function to relevant columns
-        df_timesheet['project_id'] = df_timesheet['project_id'].apply(extract_id)
-        df_timesheet['employee_id'] = df_timesheet['employee_id'].apply(extract_id)
-        df_tasks['project_id'] = df_tasks['project_id'].apply(extract_id)
-
-        # Create dictionaries to map IDs to names
-        project_id_to_name = dict(zip(df_portfolio['id'], df_portfolio['name'])) if 'id' in df_portfolio.columns and 'name' in df_portfolio.columns else {}
-        employee_id_to_name = dict(zip(df_employees['id'], df_employees['name'])) if 'id' in df_employees.columns and 'name' in df_employees.columns else {}
-
-        # Map IDs to names in timesheet and tasks DataFrames
-        if 'project_id' in df_timesheet.columns:
-            df_timesheet['project_name'] = df_timesheet['project_id'].map(project_id_to_name)
-        if 'employee_id' in df_timesheet.columns:
-            df_timesheet['employee_name'] = df_timesheet['employee_id'].map(employee_id_to_name)
-        if 'project_id' in df_tasks.columns:
-            df_tasks['project_name'] = df_tasks['project_id'].map(project_id_to_name)
-
-        return df_portfolio, df_employees, df_sales, df_timesheet, df_tasks
+        return process_data(*(fetched[name] for name, _ in MODELS))
     except Exception as e:
         logger.error(f"Error in fetch_and_process_data: {e}")
         return None, None, None, None, None
 
+def fetch_history(start_date, end_date, df_portfolio, df_employees):
+    """
+    Fetch the models in DATE_FIELDS between start_date and end_date, to backfill history older than
+    what is loaded. Returns the sales, timesheet and tasks dataframes, or None on failure.
+    """
+    try:
+        fetched = {
+            model: fetch_odoo_data(model, fields, date_field=DATE_FIELDS[model], start_date=start_date, end_date=end_date)
+            for model, fields in MODELS if model in DATE_FIELDS
+        }
+
+        # Projects and employees are already loaded, they are only needed to map ids to names
+        _, _, df_sales, df_timesheet, df_tasks = process_data(
+            df_portfolio[['id', 'name']].to_dict('records'),
+            df_employees[['id', 'name']].to_dict('records'),
+            fetched['sale.order'],
+            fetched['account.analytic.line'],
+            fetched['project.task']
+        )
+        return df_sales, df_timesheet, df_tasks
+    except Exception as e:
+        logger.error(f"Error in fetch_history: {e}")
+        return None
+
+def fetch_records(model_ids, df_portfolio, df_employees):
+    """
+    Fetch the given ids of each model, e.g. after change notifications.
+    model_ids maps model names to ids. Returns the five dataframes holding only the fetched records,
+    ids are mapped to names with the loaded projects and employees plus the fetched ones.
+    """
+    fetched = {
+        model: fetch_odoo_data(model, fields, domain=[('id', 'in', sorted(model_ids[model]))]) if model_ids.get(model) else []
+        for model, fields in MODELS
+    }
+
+    known_projects = df_portfolio[['id', 'name']].to_dict('records') + fetched['project.project']
+    known_employees = df_employees[['id', 'name']].to_dict('records') + fetched['hr.employee']
+    _, _, df_sales, df_timesheet, df_tasks = process_data(
+        known_projects, known_employees, fetched['sale.order'], fetched['account.analytic.line'], fetched['project.task']
+    )
+    df_portfolio, df_employees, _, _, _ = process_data(fetched['project.project'], fetched['hr.employee'], [], [], [])
+
+    return df_portfolio, df_employees, df_sales, df_timesheet, df_tasks
+
+def process_data(portfolio, employees, sales, timesheet_entries, tasks):
+    # Convert to pandas DataFrames with data validation
+    df_portfolio = validate_dataframe(pd.DataFrame(portfolio), ['id', 'name', 'partner_id', 'user_id', 'date_start', 'date', 'active'])
+    df_employees = validate_dataframe(pd.DataFrame(employees), ['id', 'name', 'department_id', 'job_id', 'job_title'])
+    df_sales = validate_dataframe(pd.DataFrame(sales), ['name', 'partner_id', 'amount_total', 'date_order'])
+    df_timesheet = validate_dataframe(pd.DataFrame(timesheet_entries), ['employee_id', 'project_id', 'unit_amount', 'date'])
+    df_tasks = validate_dataframe(pd.DataFrame(tasks), ['project_id', 'stage_id', 'create_date', 'date_end'])
+
+    # Print column names for debugging
+    logger.info("df_portfolio columns: %s", df_portfolio.columns)
+    logger.info("df_employees columns: %s", df_employees.columns)
+    logger.info("df_sales columns: %s", df_sales.columns)
+    logger.info("df_timesheet columns: %s", df_timesheet.columns)
+    logger.info("df_tasks columns: %s", df_tasks.columns)
+
+    # Convert date columns to datetime
+    date_columns = {
+        'df_portfolio': ['date_start', 'date'],
+        'df_sales': ['date_order'],
+        # 'df_financials': ['date'],
+        'df_timesheet': ['date'],
+        'df_tasks': ['create_date', 'date_end']
+    }
+
+    for df_name, columns in date_columns.items():
+        df = locals()[df_name]
+        for col in columns:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    # Apply extract_id function to relevant columns
+    df_timesheet['project_id'] = df_timesheet['project_id'].apply(extract_id)
+    df_timesheet['employee_id'] = df_timesheet['employee_id'].apply(extract_id)
+    df_tasks['project_id'] = df_tasks['project_id'].apply(extract_id)
+
+    # Create dictionaries to map IDs to names
+    project_id_to_name = dict(zip(df_portfolio['id'], df_portfolio['name'])) if 'id' in df_portfolio.columns and 'name' in df_portfolio.columns else {}
+    employee_id_to_name = dict(zip(df_employees['id'], df_employees['name'])) if 'id' in df_employees.columns and 'name' in df_employees.columns else {}
+
+    # Map IDs to names in timesheet and tasks DataFrames
+    if 'project_id' in df_timesheet.columns:
+        df_timesheet['project_name'] = df_timesheet['project_id'].map(project_id_to_name)
+    if 'employee_id' in df_timesheet.columns:
+        df_timesheet['employee_name'] = df_timesheet['employee_id'].map(employee_id_to_name)
+    if 'project_id' in df_tasks.columns:
+        df_tasks['project_name'] = df_tasks['project_id'].map(project_id_to_name)
+
+    return df_portfolio, df_employees, df_sales, df_timesheet, df_tasks
+
 if __name__ == "__main__":
     # For testing purposes
     data = fetch_and_process_data()
@@ -0,0 +1,186 @@
+import gzip
+import http.client
+import itertools
+import json
+import queue
+import threading
+import xmlrpc.client
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from logging_config import setup_logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = setup_logging()
+
+# Requests smaller than this are not worth compressing
+GZIP_THRESHOLD = 1400
+
+class KeepAliveTransport(xmlrpc.client.Transport):
+    """
+    HTTP transport that keeps its connection open between calls, with an optional
+    socket timeout and gzip compression of request bodies.
+    """
+    def __init__(self, use_gzip=False, timeout=None, **kwargs):
+        super().__init__(**kwargs)
+        self.timeout = timeout
+        self.encode_threshold = GZIP_THRESHOLD if use_gzip else None
+        self.accept_gzip_encoding = True
+
+    def make_connection(self, host):
+        if self._connection and host == self._connection[0]:
+            return self._connection[1]
+        chost, self._extra_headers, x509 = self.get_host_info(host)
+        self._connection = host, http.client.HTTPConnection(chost, timeout=self.timeout)
+        return self._connection[1]
+
+class SafeKeepAliveTransport(xmlrpc.client.SafeTransport):
+    """
+    HTTPS variant of KeepAliveTransport, the TLS handshake is paid once per connection.
+    """
+    def __init__(self, use_gzip=False, timeout=None, **kwargs):
+        super().__init__(**kwargs)
+        self.timeout = timeout
+        self.encode_threshold = GZIP_THRESHOLD if use_gzip else None
+        self.accept_gzip_encoding = True
+
+    def make_connection(self, host):
+        if self._connection and host == self._connection[0]:
+            return self._connection[1]
+        chost, self._extra_headers, x509 = self.get_host_info(host)
+        self._connection = host, http.client.HTTPSConnection(chost, None, context=self.context, timeout=self.timeout, **(x509 or {}))
+        return self._connection[1]
+
+class ServerProxyPool:
+    """
+    Pool of XML-RPC proxies, each with its own persistent connection.
+    A proxy is only used by one thread at a time, borrow one with `with pool.borrow() as proxy:`.
+    """
+    def __init__(self, uri, size=4, use_gzip=False, timeout=None):
+        self.uri = uri
+        self.size = size
+        self.use_gzip = use_gzip
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _create(self):
+        if urlparse(self.uri).scheme == 'https':
+            transport = SafeKeepAliveTransport(use_gzip=self.use_gzip, timeout=self.timeout)
+        else:
+            transport = KeepAliveTransport(use_gzip=self.use_gzip, timeout=self.timeout)
+        logger.debug(f"Opening new connection to {self.uri}")
+        return xmlrpc.client.ServerProxy(self.uri, transport=transport, allow_none=True)
+
+    @contextmanager
+    def borrow(self):
+        self._slots.acquire()
+        try:
+            try:
+                proxy = self._idle.get_nowait()
+            except queue.Empty:
+                proxy = self._create()
+
+            try:
+                yield proxy
+            except xmlrpc.client.Fault:
+                # Odoo answered, the connection is still good
+                self._idle.put(proxy)
+                raise
+            except Exception:
+                # Drop the connection, it may be half read or closed by the server
+                proxy('close')()
+                raise
+            else:
+                self._idle.put(proxy)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                proxy = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            proxy('close')()
+
+def json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+def json_loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class JsonRpcProxy:
+    """
+    Minimal stand-in for xmlrpc.client.ServerProxy talking to Odoo's /jsonrpc endpoint,
+    `proxy.execute_kw(...)` calls `execute_kw` on the given service ('common' or 'object').
+    Errors are raised as xmlrpc.client.Fault so callers handle both transports the same way.
+    """
+    def __init__(self, uri, service, use_gzip=False, timeout=None):
+        parsed = urlparse(uri)
+        self.service = service
+        self.path = parsed.path or '/jsonrpc'
+        self.use_gzip = use_gzip
+        self._ids = itertools.count(1)
+        if parsed.scheme == 'https':
+            self.connection = http.client.HTTPSConnection(parsed.netloc, timeout=timeout)
+        else:
+            self.connection = http.client.HTTPConnection(parsed.netloc, timeout=timeout)
+
+    def __call__(self, attr):
+        if attr == 'close':
+            return self.connection.close
+        raise AttributeError(f"Attribute {attr} not found")
+
+    def __getattr__(self, method):
+        def call(*args):
+            return self.call(method, *args)
+        return call
+
+    def call(self, method, *args):
+        payload = {
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'params': {'service': self.service, 'method': method, 'args': args},
+            'id': next(self._ids),
+        }
+        body = json_dumps(payload)
+        headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'}
+        if self.use_gzip and len(body) > GZIP_THRESHOLD:
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+
+        self.connection.request('POST', self.path, body, headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        if response.status != 200:
+            raise xmlrpc.client.ProtocolError(self.path, response.status, response.reason, dict(response.getheaders()))
+        if response.getheader('Content-Encoding', '') == 'gzip':
+            data = gzip.decompress(data)
+
+        result = json_loads(data)
+        if result.get('error'):
+            error = result['error']
+            error_data = error.get('data') or {}
+            raise xmlrpc.client.Fault(error.get('code', 0), f"{error_data.get('name', '')}: {error_data.get('message') or error.get('message')}")
+        return result.get('result')
+
+class JsonRpcPool(ServerProxyPool):
+    """
+    ServerProxyPool handing out JsonRpcProxy objects for one Odoo service.
+    """
+    def __init__(self, uri, service, size=4, use_gzip=False, timeout=None):
+        super().__init__(uri, size=size, use_gzip=use_gzip, timeout=timeout)
+        self.service = service
+
+    def _create(self):
+        logger.debug(f"Opening new connection to {self.uri}")
+        return JsonRpcProxy(self.uri, self.service, use_gzip=self.use_gzip, timeout=self.timeout)
@@ -1,34 +1,53 @@
 import os
 
 import dash
-from dash import dcc, html
+import diskcache
+import plotly.io as pio
+from dash import DiskcacheManager, dcc, html
 from dash.dependencies import Input, Output
 from dotenv import find_dotenv, load_dotenv
+from flask_compress import Compress
 from urllib.parse import urlparse, parse_qs
 
 from callbacks.callbacks import register_callbacks
+from change_feed import ChangeBatcher, register_change_feed
 from data_management import DataManager
 from layout import create_layout, create_login_layout
 from auth import authenticate
 from logging_config import setup_logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = setup_logging()
 
 load_dotenv(find_dotenv(filename='cfg/.env', raise_error_if_not_found=True))
 
 def create_app():
     # Initialize Dash app
-    app = dash.Dash(__name__, suppress_callback_exceptions=True)
+    # Long running callbacks (e.g. Calculate Financials) run in worker processes queued through a local disk cache
+    background_callback_manager = DiskcacheManager(diskcache.Cache(os.getenv('BACKGROUND_CALLBACK_DIR') or 'data/background_callbacks'))
+    app = dash.Dash(__name__, suppress_callback_exceptions=True, background_callback_manager=background_callback_manager)
+    configure_responses(app)
 
     # Initialize DataManager
     data_manager = DataManager()
 
     login_layout = create_login_layout()
-    logged_in_layout = create_layout(data_manager)
 
     register_callbacks(app, data_manager)
     logger.info("Callbacks registered")
 
+    # Receive record changes pushed from Odoo
+    register_change_feed(app.server, ChangeBatcher(data_manager))
+
+    # Pick up snapshots written by sync.py without restarting the server
+    @app.server.before_request
+    def pick_up_new_snapshot():
+        data_manager.reload_if_changed()
+
     # Add a new function to retrieve token from URL
     def serve_layout():
         return html.Div([
@@ -56,7 +75,8 @@ def create_app():
                     if token_data:
                         data_manager.load_all_data()
 
-                        return logged_in_layout
+                        # Built after loading so the layout starts with the current data version and options
+                        return create_layout(data_manager)
 
                 except ValueError as e:
                     logger.info(f"Authentication error: {e}")
@@ -65,6 +85,21 @@ def create_app():
 
     return app
 
+def configure_responses(app):
+    """
+    Callback outputs go through plotly's JSON encoder, which uses orjson when it is installed.
+    Responses are compressed with the algorithms in RESPONSE_COMPRESSION the browser accepts, in order of preference.
+    """
+    if orjson is not None:
+        pio.json.config.default_engine = 'orjson'
+
+    algorithms = [algorithm.strip() for algorithm in (os.getenv('RESPONSE_COMPRESSION') or 'br,gzip').split(',') if algorithm.strip()]
+    if algorithms and algorithms != ['none']:
+        app.server.config['COMPRESS_ALGORITHM'] = algorithms
+        Compress(app.server)
+
+    logger.info(f"JSON encoder: {pio.json.config.default_engine or 'json'}, response compression: {', '.join(algorithms) or 'none'}")
+
 def main():
     app = create_app()
 
@@ -0,0 +1,145 @@
+import os
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+import pandas as pd
+
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+def tokenize(text) -> List[str]:
+    """Lowercase words of a name or a search, punctuation and regex characters are separators."""
+    return TOKEN_PATTERN.findall(str(text).lower()) if pd.notna(text) else []
+
+def dropdown_page_size() -> int:
+    return int(os.getenv('DROPDOWN_PAGE_SIZE') or '100')
+
+class NameSearchIndex:
+    """
+    Case-insensitive prefix and substring search over the names of a dimension table, so dropdowns
+    with tens of thousands of entries only send the browser the names matching what was typed.
+    """
+    def __init__(self, names: Iterable):
+        unique_names = {name for name in names if pd.notna(name)}
+        self.names = sorted(unique_names, key=lambda name: (str(name).lower(), str(name)))
+        self._keys = [str(name).lower() for name in self.names]
+        logger.debug(f"Built name index of {len(self.names)} names")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def search(self, query: Optional[str], limit: Optional[int] = None) -> List:
+        """
+        Up to limit names containing query, names starting with it first. An empty query returns the first names.
+        """
+        limit = dropdown_page_size() if limit is None else limit
+        query = (query or '').strip().lower()
+        if not query:
+            return self.names[:limit]
+
+        # Prefix matches are a contiguous run of the sorted keys
+        matches = []
+        position = bisect_left(self._keys, query)
+        while position < len(self._keys) and len(matches) < limit and self._keys[position].startswith(query):
+            matches.append(self.names[position])
+            position += 1
+
+        if len(matches) < limit:
+            for name, key in zip(self.names, self._keys):
+                if query in key and not key.startswith(query):
+                    matches.append(name)
+                    if len(matches) >= limit:
+                        break
+        return matches
+
+    def options(self, query: Optional[str] = None, selected: Union[None, str, List] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Dropdown options for the names matching query. The selected values always come first,
+        so they stay resolvable whatever was typed.
+        """
+        if selected is None:
+            selected = []
+        elif not isinstance(selected, list):
+            selected = [selected]
+
+        names = list(selected) + [name for name in self.search(query, limit) if name not in selected]
+        return [{'label': name, 'value': name} for name in names]
+
+class TokenIndex:
+    """
+    Inverted index from the words of record names to Odoo ids, so keyword filters are set lookups
+    instead of a regex over every name. Built once per snapshot and updated in place with the records
+    a change notification touched.
+    """
+    def __init__(self, ids: Iterable = (), names: Iterable = ()):
+        self._postings: Dict[str, Set[int]] = {}
+        self._tokens_by_id: Dict[int, Set[str]] = {}
+        self._sorted_tokens: Optional[List[str]] = None
+        self._lock = threading.Lock()
+        self.update(ids, names)
+
+    def __len__(self) -> int:
+        return len(self._tokens_by_id)
+
+    def update(self, ids: Iterable, names: Iterable):
+        """Index created records and re-index renamed ones."""
+        with self._lock:
+            for record_id, name in zip(ids, names):
+                record_id = int(record_id)
+                self._remove(record_id)
+                tokens = set(tokenize(name))
+                self._tokens_by_id[record_id] = tokens
+                for token in tokens:
+                    if token not in self._postings:
+                        self._postings[token] = set()
+                        self._sorted_tokens = None
+                    self._postings[token].add(record_id)
+
+    def remove(self, ids: Iterable):
+        with self._lock:
+            for record_id in ids:
+                self._remove(int(record_id))
+
+    def _remove(self, record_id: int):
+        for token in self._tokens_by_id.pop(record_id, ()):
+            postings = self._postings[token]
+            postings.discard(record_id)
+            if not postings:
+                del self._postings[token]
+                self._sorted_tokens = None
+
+    def search(self, query: str) -> Set[int]:
+        """
+        Ids of the records whose name has a word starting with each word of query, e.g. "dev api" finds "API development".
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return set()
+
+        with self._lock:
+            if self._sorted_tokens is None:
+                self._sorted_tokens = sorted(self._postings)
+
+            matches = None
+            for prefix in tokens:
+                ids = set()
+                position = bisect_left(self._sorted_tokens, prefix)
+                while position < len(self._sorted_tokens) and self._sorted_tokens[position].startswith(prefix):
+                    ids |= self._postings[self._sorted_tokens[position]]
+                    position += 1
+                matches = ids if matches is None else matches & ids
+                if not matches:
+                    break
+            return matches
+
+    def search_any(self, queries: Iterable[str]) -> Set[int]:
+        """Ids of the records matching any of queries, e.g. the comma-separated keywords of a filter."""
+        matches = set()
+        for query in queries:
+            matches |= self.search(query)
+        return matches
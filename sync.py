@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+
+from dotenv import find_dotenv, load_dotenv
+
+from data_management import DataManager
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+load_dotenv(find_dotenv(filename='cfg/.env', raise_error_if_not_found=True))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch data from Odoo and write the dashboard snapshot.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--full', action='store_true', help="Ignore the cached snapshot and fetch everything")
+    mode.add_argument('--incremental', action='store_true', help="Only fetch records changed since the last sync (default)")
+    parser.add_argument('--restart', action='store_true', help="Discard the checkpoint of an interrupted full sync instead of resuming it")
+    return parser.parse_args(argv)
+
+def print_summary(summary):
+    logger.info("\n--- Sync Summary ---")
+    logger.info(f"Mode: {summary['mode']}")
+    logger.info(f"Status: {'success' if summary['success'] else 'failed'}")
+    logger.info(f"Fetch time: {summary['fetch_seconds']:.2f}s")
+    logger.info(f"Total time: {summary['total_seconds']:.2f}s")
+    for name, rows in summary['total_rows'].items():
+        logger.info(f"{name}: {summary['fetched_rows'].get(name, 0)} fetched, {rows} in snapshot")
+    logger.info("--- End of Summary ---\n")
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    data_manager = DataManager()
+    os.makedirs(os.path.dirname(data_manager.DATA_FILE), exist_ok=True)
+
+    summary = data_manager.sync(full=args.full, restart=args.restart)
+    print_summary(summary)
+
+    return 0 if summary['success'] else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
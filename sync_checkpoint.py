@@ -0,0 +1,101 @@
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime
+from typing import Dict, List
+
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+class SyncCheckpoint:
+    """
+    Progress of a full sync, so an interrupted sync can resume instead of starting from zero.
+    For every model it keeps the batches already persisted and the last id they cover.
+
+    Layout:
+        <directory>/sync.json                  when the sync was started
+        <directory>/<model>/checkpoint.json    last_id, batch files, done flag
+        <directory>/<model>/batch_00000.pkl    records of one batch
+    """
+    def __init__(self, directory: str = 'data/sync'):
+        self.directory = directory
+        self._states: Dict[str, Dict] = {}
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.directory, 'sync.json'))
+
+    def start(self, time: datetime) -> datetime:
+        """
+        Record the start of a full sync and return it. When resuming, the original start time is kept
+        so the next incremental sync also picks up changes made while the sync was interrupted.
+        """
+        meta_file = os.path.join(self.directory, 'sync.json')
+        if os.path.exists(meta_file):
+            with open(meta_file, 'r') as f:
+                started_at = datetime.fromisoformat(json.load(f)['started_at'])
+            logger.info(f"Resuming full sync started at {started_at}")
+            return started_at
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_json(meta_file, {'started_at': time.isoformat()})
+        return time
+
+    def last_id(self, model: str) -> int:
+        return self._state(model)['last_id']
+
+    def is_done(self, model: str) -> bool:
+        return self._state(model)['done']
+
+    def save_batch(self, model: str, records: List[Dict], last_id: int):
+        state = self._state(model)
+        model_dir = self._model_dir(model)
+        os.makedirs(model_dir, exist_ok=True)
+
+        batch_file = f"batch_{len(state['batches']):05d}.pkl"
+        with open(os.path.join(model_dir, batch_file), 'wb') as f:
+            pickle.dump(records, f)
+
+        state['batches'].append(batch_file)
+        state['last_id'] = last_id
+        self._write_json(os.path.join(model_dir, 'checkpoint.json'), state)
+        logger.debug(f"Checkpoint {model}: {len(state['batches'])} batches, last id {last_id}")
+
+    def mark_done(self, model: str):
+        state = self._state(model)
+        state['done'] = True
+        os.makedirs(self._model_dir(model), exist_ok=True)
+        self._write_json(os.path.join(self._model_dir(model), 'checkpoint.json'), state)
+
+    def load_records(self, model: str) -> List[Dict]:
+        records = []
+        for batch_file in self._state(model)['batches']:
+            with open(os.path.join(self._model_dir(model), batch_file), 'rb') as f:
+                records.extend(pickle.load(f))
+        return records
+
+    def clear(self):
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+        self._states = {}
+
+    def _model_dir(self, model: str) -> str:
+        return os.path.join(self.directory, model)
+
+    def _state(self, model: str) -> Dict:
+        if model not in self._states:
+            checkpoint_file = os.path.join(self._model_dir(model), 'checkpoint.json')
+            if os.path.exists(checkpoint_file):
+                with open(checkpoint_file, 'r') as f:
+                    self._states[model] = json.load(f)
+            else:
+                self._states[model] = {'last_id': 0, 'batches': [], 'done': False}
+        return self._states[model]
+
+    @staticmethod
+    def _write_json(path: str, data: Dict):
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, path)
@@ -0,0 +1,27 @@
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+import plotly.io as pio
+
+from chart_builder import bar, figure, trace
+
+def test_figure_matches_graph_objs():
+    dates = pd.date_range('2024-01-01', periods=50)
+    hours = pd.Series(np.linspace(0, 8, 50))
+    layout = {'title': {'text': 'Hours'}, 'xaxis': {'title': {'text': 'Date'}}, 'barmode': 'stack'}
+
+    built = figure([
+        bar(x=dates, y=hours, text=pd.Series(range(50)), name='Oodash'),
+        trace('scatter', x=list(range(3)), y=np.arange(3.0), hovertext=['a', 1, None])
+    ], **layout)
+    expected = go.Figure([
+        go.Bar(x=dates, y=hours, text=pd.Series(range(50)), name='Oodash'),
+        go.Scatter(x=list(range(3)), y=np.arange(3.0), hovertext=['a', 1, None])
+    ], layout=layout)
+
+    built_json = pio.to_json(built)
+    assert json.loads(built_json) == json.loads(pio.to_json(expected))
+    # Numeric arrays go out as typed arrays
+    assert '"bdata"' in built_json
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from data_management import DataManager, parse_many2one
+
+def make_data_manager():
+    data_manager = DataManager()
+    data_manager.df_employees = pd.DataFrame({'id': [1], 'name': ['Alice'], 'job_id': [[3, 'Developer']]})
+    data_manager.df_tasks = pd.DataFrame({'id': [12, 13], 'name': ['API development', 'Testing']})
+    data_manager.df_timesheet = pd.DataFrame({
+        'id': [1, 2],
+        'employee_name': ['Alice', 'Alice'],
+        'project_name': ['Oodash', 'Oodash'],
+        'task_id': [[12, 'API development'], False],
+        'unit_amount': [8.0, 4.0],
+        'date': pd.to_datetime(['2024-01-01', '2024-01-02'])
+    })
+    return data_manager
+
+def test_parse_many2one():
+    assert parse_many2one([12, 'Name']) == (12, 'Name')
+    assert parse_many2one("[12, 'Name']") == (12, 'Name')
+    assert parse_many2one(False) is None
+    assert parse_many2one('not a many2one') is None
+
+def test_task_names_after_merge():
+    data_manager = make_data_manager()
+    new_timesheet = pd.DataFrame({
+        'id': [3],
+        'employee_name': ['Alice'],
+        'project_name': ['Oodash'],
+        'task_id': [[13, 'Testing']],
+        'unit_amount': [2.0],
+        'date': pd.to_datetime(['2024-01-03'])
+    })
+
+    data_manager.df_timesheet, = data_manager.merge_new_data([data_manager.df_timesheet], [new_timesheet])
+    timesheet = data_manager.get_enriched_timesheet().sort_values('id')
+
+    assert timesheet['task_name'].tolist() == ['API development', 'Unknown', 'Testing']
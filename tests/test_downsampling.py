@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from downsampling import MIN_BAR_WIDTH_PX, bar_bucket, downsample_line, lttb_indices, zoom_event, zoomed_range
+
+def test_lttb_keeps_endpoints_and_threshold_points():
+    x = np.arange(10000)
+    y = np.sin(x / 100)
+
+    indices = lttb_indices(x, y, 500)
+
+    assert len(indices) == 500
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+
+def test_lttb_keeps_peaks():
+    y = np.zeros(1000)
+    y[437] = 100
+
+    assert 437 in lttb_indices(np.arange(1000), y, 50)
+
+def test_lttb_passes_through_short_series():
+    assert lttb_indices(np.arange(10), np.arange(10), 20).tolist() == list(range(10))
+
+def test_downsample_line_to_viewport_width():
+    dates = pd.date_range('2020-01-01', periods=5000, freq='D')
+    data = pd.DataFrame({'date': dates[::-1], 'amount': np.random.default_rng(0).random(5000)})
+
+    plotted = downsample_line(data, 'date', 'amount', 800)
+
+    assert len(plotted) == 800
+    assert plotted['date'].iloc[0] == dates[0] and plotted['date'].iloc[-1] == dates[-1]
+    assert plotted['date'].is_monotonic_increasing
+
+def test_downsample_line_passes_through_fewer_points_than_width():
+    data = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=30), 'amount': range(30)})
+
+    assert downsample_line(data, 'date', 'amount', 800).equals(data)
+
+def test_bar_bucket_fits_viewport():
+    width = 1200
+    max_bars = width // MIN_BAR_WIDTH_PX
+
+    assert bar_bucket('2024-01-01', '2024-03-31', width) == ('D', 'Daily')
+    assert bar_bucket('2020-01-01', pd.Timestamp('2020-01-01') + pd.Timedelta(days=max_bars * 2), width) == ('W', 'Weekly')
+    assert bar_bucket('2000-01-01', '2024-12-31', width) == ('M', 'Monthly')
+    assert bar_bucket('1700-01-01', '2024-12-31', width)[0] == 'Y'
+
+def test_zoom_helpers():
+    assert zoom_event({'xaxis.range[0]': '2024-01-01', 'xaxis.range[1]': '2024-02-01'})
+    assert zoom_event({'xaxis.autorange': True})
+    assert not zoom_event({'dragmode': 'pan'})
+    assert not zoom_event(None)
+
+    assert zoomed_range({'xaxis.range[0]': '2024-01-01', 'xaxis.range[1]': '2024-02-01'}) == (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01'))
+    assert zoomed_range({'xaxis.range': ['2024-01-01', '2024-02-01']}) == (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01'))
+    assert zoomed_range({'xaxis.autorange': True}) is None
@@ -0,0 +1,48 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fetch_controller import AdaptiveBatchController, fetch_in_batches
+
+def flaky_reader(seed, failure_rate=0.3):
+    """read_batch that fails at random, returning one row per id otherwise."""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def read_batch(ids):
+        with lock:
+            fail = rng.random() < failure_rate
+            pause = rng.random() / 1000
+        time.sleep(pause)
+        if fail:
+            raise ConnectionError("Odoo timed out")
+        return [{'id': record_id} for record_id in ids]
+
+    return read_batch
+
+def test_fetch_in_batches_with_failures_returns_every_id_once():
+    for seed in range(8):
+        # One controller shared by concurrent fetches, like the models of a sync
+        controller = AdaptiveBatchController(batch_size=50, min_batch_size=1, max_batch_size=400, max_concurrency=4,
+                                             target_latency=0.001, max_retries=20, backoff_base=0)
+        id_ranges = [list(range(fetch * 10000, fetch * 10000 + 500)) for fetch in range(4)]
+
+        with ThreadPoolExecutor(max_workers=len(id_ranges)) as executor:
+            futures = [executor.submit(fetch_in_batches, flaky_reader(seed * 10 + fetch), ids, controller)
+                       for fetch, ids in enumerate(id_ranges)]
+            results = [future.result() for future in futures]
+
+        for ids, rows in zip(id_ranges, results):
+            assert [row['id'] for row in rows] == ids
+
+def test_fetch_in_batches_on_batch_in_id_order():
+    controller = AdaptiveBatchController(batch_size=7, max_concurrency=3, backoff_base=0)
+    ids = list(range(100))
+    flushed = []
+
+    rows = fetch_in_batches(flaky_reader(0, failure_rate=0), ids, controller,
+                            on_batch=lambda batch_ids, batch_rows: flushed.extend(batch_ids))
+
+    assert [row['id'] for row in rows] == ids
+    assert flushed == ids
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_management import DataManager
+from financial_calculator import FinancialCalculator
+
+def make_data_manager(tmp_path, rows=3000):
+    rng = np.random.default_rng(0)
+    data_manager = DataManager(DATA_FILE=str(tmp_path / 'odoo_data.pkl'))
+    data_manager.df_portfolio = pd.DataFrame({'id': range(4), 'name': ['Alpha', 'Beta', 'Gamma', 'Delta']})
+    data_manager.df_employees = pd.DataFrame({'id': [1, 2], 'name': ['Alice', 'Bob'], 'job_title': ['Developer', 'Manager']})
+    data_manager.df_tasks = pd.DataFrame({'id': [1, 2], 'name': ['Build', 'Test']})
+    data_manager.job_costs = {'Developer': {'cost': '', 'revenue': '800'}, 'Manager': {'cost': '', 'revenue': '1000'}}
+    data_manager.df_timesheet = pd.DataFrame({
+        # Projects outside the portfolio and employees missing from the employees data are included on purpose
+        'project_name': rng.choice(['Alpha', 'Beta', 'Gamma', 'Unknown project'], rows),
+        'employee_name': rng.choice(['Alice', 'Bob', 'Carol', np.nan], rows),
+        'task_id': [[int(task), 'Task'] if task else False for task in rng.integers(0, 3, rows)],
+        'unit_amount': rng.random(rows) * 8,
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 60, rows), unit='D')
+    })
+    return data_manager
+
+def comparable(names):
+    return ['NaN' if isinstance(name, float) and np.isnan(name) else name for name in names]
+
+def test_sharded_financials_match_per_project_loop(tmp_path):
+    calculator = FinancialCalculator(make_data_manager(tmp_path))
+    start_date, end_date = pd.Timestamp('2024-01-05'), pd.Timestamp('2024-02-20')
+
+    expected = calculator.calculate_all_financials(start_date, end_date)
+    sharded = calculator.calculate_financials_sharded('date', start_date, end_date, workers=2)
+
+    assert list(sharded) == list(expected) == ['Alpha', 'Beta', 'Gamma']
+    for project, financials in expected.items():
+        assert sharded[project]['total_revenue'] == pytest.approx(financials['total_revenue'])
+        assert sharded[project]['total_hours'] == pytest.approx(financials['total_hours'])
+        assert len(sharded[project]['daily_data']) == len(financials['daily_data'])
+        for sharded_day, expected_day in zip(sharded[project]['daily_data'], financials['daily_data']):
+            assert sharded_day['date'] == expected_day['date']
+            assert sharded_day['unit_amount'] == pytest.approx(expected_day['unit_amount'])
+            assert comparable(sharded_day['employee_name']) == comparable(expected_day['employee_name'])
+            assert sharded_day['task_id'] == expected_day['task_id']
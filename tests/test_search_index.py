@@ -0,0 +1,60 @@
+import pandas as pd
+
+import data_management
+from data_management import DataManager
+from search_index import NameSearchIndex, TokenIndex
+
+NAMES = ['Website redesign', 'Odoo migration', 'odoo support', 'Mobile app', 'Data migration', None, 'Website redesign']
+
+def test_name_search_prefix_matches_first():
+    index = NameSearchIndex(NAMES)
+
+    assert len(index) == 5
+    assert index.search('odoo') == ['Odoo migration', 'odoo support']
+    assert index.search('MIGR') == ['Data migration', 'Odoo migration']
+    # Names starting with the query come before names containing it
+    assert index.search('m') == ['Mobile app', 'Data migration', 'Odoo migration']
+
+def test_name_search_limits():
+    index = NameSearchIndex(NAMES)
+
+    assert index.search('', limit=2) == ['Data migration', 'Mobile app']
+    assert index.search('o', limit=3) == ['Odoo migration', 'odoo support', 'Data migration']
+    assert index.search('nothing like it', limit=3) == []
+
+def test_name_options_keep_selected():
+    options = NameSearchIndex(NAMES).options('odoo', selected=['Mobile app'], limit=1)
+
+    assert [option['value'] for option in options] == ['Mobile app', 'Odoo migration']
+
+def test_token_search_matches_word_prefixes():
+    index = TokenIndex([1, 2, 3, 4], ['API development', 'Fix c++ build', 'Develop mobile API', 'Testing'])
+
+    assert index.search('dev api') == {1, 3}
+    assert index.search('API DEVELOPMENT') == {1}
+    assert index.search('c++') == {2}
+    assert index.search('velop') == set()
+    assert index.search('') == set()
+    assert index.search_any(['test', 'build']) == {2, 4}
+
+def test_token_index_updates_with_applied_changes(monkeypatch, tmp_path):
+    data_manager = DataManager(DATA_FILE=str(tmp_path / 'odoo_data.pkl'), DATA_VERSION_DIR=str(tmp_path / 'data_version'),
+                               sync_in_web=True, snapshot_write_delay=3600)
+    data_manager.df_tasks = pd.DataFrame({'id': [1, 2, 3], 'name': ['API development', 'Testing', 'Deploy API']})
+    assert data_manager.get_token_index('df_tasks').search('api') == {1, 3}
+
+    fetched_tasks = pd.DataFrame({'id': [2, 4], 'name': ['API testing', 'Write docs']})
+    monkeypatch.setattr(data_management, 'fetch_records', lambda model_ids, df_portfolio, df_employees: (
+        pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), fetched_tasks
+    ))
+    index = data_manager.get_token_index('df_tasks')
+
+    # Task 2 is renamed, task 4 created and task 3 unlinked
+    data_manager.apply_changes({'project.task': {'upsert': {2, 4}, 'unlink': {3}}})
+
+    assert data_manager.get_token_index('df_tasks') is index
+    assert index.search('api') == {1, 2}
+    assert index.search('testing') == {2}
+    assert index.search('docs') == {4}
+    assert index.search('deploy') == set()
+    assert sorted(data_manager.df_tasks['id']) == [1, 2, 4]